@@ -3,15 +3,27 @@ import os
 
 import click
 from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, send_from_directory
-from flask_wtf.csrf import generate_csrf, CSRFError
+from flask_wtf.csrf import CSRFError
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import select
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from .config import config, ROOT_DIR
-from .extensions import db, login_manager, migrate, csrf, limiter
+from .config import config, ROOT_DIR, INSTANCE_DIR
+from .extensions import db, login_manager, migrate, csrf, limiter, compress, init_sqlite_pragmas
+from .json_provider import OrjsonProvider
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
+# Same four headers on every response — built once here rather than per
+# request in add_security_headers().
+_SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Permissions-Policy": "camera=(), microphone=(), geolocation=()",
+}
+
 
 def create_app(config_name: str = "default") -> Flask:
     """
@@ -32,6 +44,7 @@ def create_app(config_name: str = "default") -> Flask:
     # Configuration
     # ------------------------------------------------------------------
     app.config.from_object(config[config_name])
+    app.json = OrjsonProvider(app)
 
     # Guard: fail loudly if SECRET_KEY is missing in production
     if config_name == "production" and app.config["SECRET_KEY"] == "dev-only-change-me":
@@ -47,6 +60,19 @@ def create_app(config_name: str = "default") -> Flask:
             "will work but generate real VAPID keys for production."
         )
 
+    # ------------------------------------------------------------------
+    # Templates
+    # ------------------------------------------------------------------
+    # Compiled template bytecode is shared across workers and restarts, so
+    # a fresh gunicorn worker loads index.html & co. from disk instead of
+    # re-parsing them on its first request. Entries are keyed on the
+    # template source's checksum, so an edited template never serves stale
+    # bytecode. Tests skip it to avoid writing into instance/.
+    if not app.testing:
+        cache_dir = os.path.join(INSTANCE_DIR, "jinja_cache")
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=cache_dir)
+
     # ------------------------------------------------------------------
     # Middleware
     # ------------------------------------------------------------------
@@ -56,10 +82,12 @@ def create_app(config_name: str = "default") -> Flask:
     # Extensions
     # ------------------------------------------------------------------
     db.init_app(app)
+    init_sqlite_pragmas(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
     csrf.init_app(app)
     limiter.init_app(app)
+    compress.init_app(app)
 
     login_manager.login_view = "auth.login"
     # "strong" mode fingerprints the session against IP + User-Agent and
@@ -75,8 +103,11 @@ def create_app(config_name: str = "default") -> Flask:
     # ------------------------------------------------------------------
     # Models — must be imported so Flask-Migrate sees them
     # ------------------------------------------------------------------
-    from .models import User, Note, Transaction, Feedback, Budget, PushSubscription  # noqa: F401
+    from .models import User, Note, Transaction, Feedback, Budget, PushSubscription, UserFinance  # noqa: F401
     from .models.scenario import Scenario  # noqa: F401
+    # Registers the before_flush hook that keeps UserFinance in step with
+    # Transaction writes.
+    from .services import finance_totals_service  # noqa: F401
 
     @login_manager.user_loader
     def load_user(user_id: str):
@@ -119,23 +150,19 @@ def create_app(config_name: str = "default") -> Flask:
         return response
 
     # ------------------------------------------------------------------
-    # Context processors
+    # Request hooks
     # ------------------------------------------------------------------
-    @app.context_processor
-    def inject_csrf_token():
-        # Do not name this key "csrf_token" — Flask-WTF provides that name
-        # already; overriding it breaks WTForms template helpers.
-        return {"csrf_token_value": generate_csrf()}
+    from .utils import drop_expired_undo_snapshots, vary_on_negotiation
+
+    app.before_request(drop_expired_undo_snapshots)
+    app.after_request(vary_on_negotiation)
 
     # ------------------------------------------------------------------
     # Security headers (applied to every response)
     # ------------------------------------------------------------------
     @app.after_request
     def add_security_headers(response):
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=()"
+        response.headers.update(_SECURITY_HEADERS)
         return response
 
     # ------------------------------------------------------------------
@@ -185,7 +212,7 @@ def create_app(config_name: str = "default") -> Flask:
         """Grant a user admin access: flask make-admin <username>."""
         from .models import User
 
-        user = User.query.filter_by(username=username).first()
+        user = db.session.scalar(select(User).filter_by(username=username))
         if user is None:
             click.echo(f"No user found with username {username!r}.")
             return
@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 
 from flask import abort, jsonify, render_template, request
 from flask_login import current_user, login_required
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from ...extensions import db
 from ...models import Transaction, User
@@ -39,6 +39,12 @@ def _time_ago(dt) -> str:
     return dt.strftime("%b %d, %Y")
 
 
+def _open_feedback_count() -> int:
+    return db.session.scalar(
+        select(func.count(Feedback.id)).where(Feedback.status == "new")
+    )
+
+
 @admin_bp.before_request
 @login_required
 def require_admin():
@@ -48,7 +54,7 @@ def require_admin():
 
 @admin_bp.route("/")
 def overview():
-    users = User.query.order_by(User.created_at.desc()).all()
+    users = db.session.scalars(select(User).order_by(User.created_at.desc())).all()
     user_rows = [
         {
             "id": u.id,
@@ -63,7 +69,7 @@ def overview():
     ]
 
     status_filter = request.args.get("status", "all")
-    feedback_query = Feedback.query.order_by(Feedback.created_at.desc())
+    feedback_query = select(Feedback).order_by(Feedback.created_at.desc())
     if status_filter in VALID_STATUSES:
         feedback_query = feedback_query.filter_by(status=status_filter)
     feedback_items = [
@@ -76,11 +82,11 @@ def overview():
             "author_name": (f.author.first_name or f.author.username) if f.author else "Unknown",
             "created_label": _time_ago(f.created_at),
         }
-        for f in feedback_query.limit(200).all()
+        for f in db.session.scalars(feedback_query.limit(200))
     ]
 
-    open_count = Feedback.query.filter_by(status="new").count()
-    total_transactions = db.session.query(func.count(Transaction.id)).scalar() or 0
+    open_count = _open_feedback_count()
+    total_transactions = db.session.scalar(select(func.count(Transaction.id)))
 
     return render_template(
         "admin.html",
@@ -88,7 +94,7 @@ def overview():
         feedback_items=feedback_items,
         status_filter=status_filter,
         open_count=open_count,
-        total_feedback=Feedback.query.count(),
+        total_feedback=db.session.scalar(select(func.count(Feedback.id))),
         total_users=len(users),
         total_transactions=total_transactions,
     )
@@ -104,7 +110,7 @@ def overview():
 def inject_admin_badge():
     if not current_user.is_authenticated or not current_user.is_admin:
         return {}
-    return {"admin_open_feedback_count": Feedback.query.filter_by(status="new").count()}
+    return {"admin_open_feedback_count": _open_feedback_count()}
 
 
 @admin_bp.route("/feedback/<int:item_id>/status", methods=["PATCH"])
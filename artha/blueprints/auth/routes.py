@@ -3,6 +3,7 @@ from datetime import datetime, timezone
 
 from flask import render_template, redirect, url_for, request, flash
 from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy import select
 
 from ...extensions import db, limiter
 from ...models import User
@@ -28,11 +29,11 @@ def register():
             flash("Password must be at least 8 characters.", "error")
             return redirect(url_for("auth.register"))
 
-        if User.query.filter_by(username=username).first():
+        if db.session.scalar(select(User.id).filter_by(username=username)):
             flash("Username already exists.", "error")
             return redirect(url_for("auth.register"))
 
-        if User.query.filter_by(email=email).first():
+        if db.session.scalar(select(User.id).filter_by(email=email)):
             flash("Email already exists.", "error")
             return redirect(url_for("auth.register"))
 
@@ -67,8 +68,12 @@ def login():
 
         remember = request.form.get("remember") == "on"
 
-        user = User.query.filter_by(username=username).first()
+        user = db.session.scalar(select(User).filter_by(username=username))
         if user and user.check_password(password):
+            # The plaintext is only ever in hand right here, so this is the
+            # one place a legacy hash can be upgraded in place.
+            if user.password_needs_rehash:
+                user.set_password(password)
             user.last_login_at = datetime.now(timezone.utc)
             db.session.commit()
             login_user(user, remember=remember)
@@ -6,13 +6,15 @@ from decimal import Decimal
 
 from flask import render_template, redirect, url_for, request, flash, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.orm import load_only
 
 from ...extensions import db
 from ...models import Note, Transaction, Event
 from ...models.budget import Budget
 from ...services.exchange_rate_service import get_rates
-from ...utils import current_month_bounds, derive_title_and_preview, budget_status
+from ...services.finance_totals_service import get_month_totals
+from ...utils import current_month_bounds, derive_title_and_preview, budget_status, next_position
 from . import dashboard_bp
 
 log = logging.getLogger(__name__)
@@ -21,6 +23,10 @@ log = logging.getLogger(__name__)
 # — reused rather than importing across blueprints for one small constant.
 EVENT_COLORS = {"sage", "coral", "plum", "slate", "sky", "amber"}
 
+# The dashboard's transaction widget is a recent-activity view; the full
+# month (and every other month) lives on /finance behind its month tabs.
+DASHBOARD_TX_LIMIT = 50
+
 
 @dashboard_bp.get("/healthz")
 def healthz():
@@ -33,19 +39,13 @@ def index():
     if request.method == "POST":
         note_content = request.form.get("note", "").strip()
         if note_content:
-            max_pos = (
-                db.session.query(func.max(Note.position))
-                .filter_by(user_id=current_user.id)
-                .scalar()
-                or 0
-            )
             derived_title, preview = derive_title_and_preview(note_content)
             new_note = Note(
                 title=derived_title,
                 content=note_content,
                 preview=preview,
                 user_id=current_user.id,
-                position=int(max_pos) + 1,
+                position=next_position(Note, current_user.id),
             )
             try:
                 db.session.add(new_note)
@@ -60,48 +60,49 @@ def index():
     uid = current_user.id
     today = date.today()
 
-    notes = (
-        Note.query.filter_by(user_id=uid)
-        .order_by(Note.position.asc(), Note.id.asc())
-        .all()
-    )
     # Dashboard cards are scoped to the current calendar month — same
     # default the /finance page's month tabs use. This used to sum every
     # transaction the user ever entered, all-time, which made the cards
     # both misleading and inconsistent with the rest of the app.
     month_start, month_end = current_month_bounds()
-
-    transactions = (
-        Transaction.query.filter(
-            Transaction.user_id == uid,
-            Transaction.timestamp >= month_start,
-            Transaction.timestamp < month_end,
+    income, expense = get_month_totals(uid, month_start)
+
+    # The "Recent notes" card only ever shows the three newest, by title
+    # and preview — no need to pull every note's full content.
+    notes = db.session.scalars(
+        select(Note)
+        .options(load_only(Note.id, Note.title, Note.preview))
+        .filter_by(user_id=uid)
+        .order_by(Note.id.desc())
+        .limit(3)
+    ).all()
+
+    # Read-only, so plain rows rather than ORM objects — no identity-map or
+    # instrumentation cost per transaction. Only the columns
+    # partials/transaction_row.html renders; its tx.<column> lookups work
+    # the same on a Row. Capped at the DASHBOARD_TX_LIMIT most recent
+    # (highest position), then flipped back to the ascending order the
+    # list has always rendered in; COUNT() OVER () carries the month's
+    # full count for the stat cards on the same rows, no second query.
+    transactions = db.session.execute(
+        select(
+            Transaction.id,
+            Transaction.description,
+            Transaction.amount,
+            Transaction.type,
+            Transaction.timestamp,
+            Transaction.is_recurring,
+            func.count().over().label("month_count"),
         )
-        .order_by(Transaction.position.asc(), Transaction.id.asc())
-        .all()
-    )
-    income = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter(
+        .where(
             Transaction.user_id == uid,
-            Transaction.type == "income",
             Transaction.timestamp >= month_start,
             Transaction.timestamp < month_end,
         )
-        .scalar()
-        or 0
-    )
-    expense = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter(
-            Transaction.user_id == uid,
-            Transaction.type == "expense",
-            Transaction.timestamp >= month_start,
-            Transaction.timestamp < month_end,
-        )
-        .scalar()
-        or 0
-    )
+        .order_by(Transaction.position.desc(), Transaction.id.desc())
+        .limit(DASHBOARD_TX_LIMIT)
+    ).all()[::-1]
+    transaction_count = transactions[0].month_count if transactions else 0
     income = float(income)
     expense = float(expense)
     balance = income - expense
@@ -126,24 +127,26 @@ def index():
             "start_label": _fmt_time(e.start),
             "end_label": _fmt_time(e.end),
         }
-        for e in Event.query.filter(
-            Event.user_id == uid,
-            Event.start >= today_start_dt,
-            Event.start < today_end_dt,
+        for e in db.session.scalars(
+            select(Event)
+            .where(
+                Event.user_id == uid,
+                Event.start >= today_start_dt,
+                Event.start < today_end_dt,
+            )
+            .order_by(Event.start.asc())
         )
-        .order_by(Event.start.asc())
-        .all()
     ]
 
-    notes_due_or_overdue = (
-        Note.query.filter(
+    notes_due_or_overdue = db.session.scalars(
+        select(Note)
+        .where(
             Note.user_id == uid,
             Note.due_date.isnot(None),
             Note.due_date <= today,
         )
         .order_by(Note.due_date.asc(), Note.pinned.desc())
-        .all()
-    )
+    ).all()
     overdue_notes = [n for n in notes_due_or_overdue if n.due_date < today]
     due_today_notes = [n for n in notes_due_or_overdue if n.due_date == today]
 
@@ -153,7 +156,7 @@ def index():
     # calendar page's "upcoming recurring" banner, just widened from one
     # nearest hit to the whole week for a dashboard callout.
     # ------------------------------------------------------------------
-    recurring_rows = Transaction.query.filter_by(user_id=uid, is_recurring=True).all()
+    recurring_rows = db.session.scalars(select(Transaction).filter_by(user_id=uid, is_recurring=True)).all()
     templates_by_key: dict[tuple[str, str], Transaction] = {}
     for t in recurring_rows:
         key = (t.description, t.type)
@@ -199,7 +202,7 @@ def index():
         summary_parts.append(f"{n} note{'s' if n != 1 else ''} due today")
     if renewals_this_week:
         summary_parts.append(f"${renewals_total:,.0f} in renewals this week")
-    budget_row = Budget.query.filter_by(user_id=uid).first()
+    budget_row = db.session.scalar(select(Budget).filter_by(user_id=uid))
     budget = budget_status(budget_row.monthly_cap if budget_row else None, Decimal(expense))
 
     summary_parts.append("spending on pace" if balance >= 0 else "spending ahead of income this month")
@@ -209,6 +212,7 @@ def index():
         "index.html",
         notes=notes,
         transactions=transactions,
+        transaction_count=transaction_count,
         income=income,
         expense=expense,
         balance=balance,
@@ -288,15 +292,15 @@ def calendar_page():
     fetch_start_dt = datetime(fetch_start.year, fetch_start.month, fetch_start.day)
     fetch_end_dt = datetime(fetch_end.year, fetch_end.month, fetch_end.day) + timedelta(days=1)
 
-    txs = (
-        Transaction.query.filter(
+    txs = db.session.scalars(
+        select(Transaction)
+        .where(
             Transaction.user_id == uid,
             Transaction.timestamp >= fetch_start_dt,
             Transaction.timestamp < fetch_end_dt,
         )
         .order_by(Transaction.timestamp.asc())
-        .all()
-    )
+    ).all()
 
     by_date = defaultdict(list)
     for t in txs:
@@ -305,7 +309,7 @@ def calendar_page():
     # Recurring rules: most-recent row per (description, type) — same
     # dedup pattern as generate_recurring() in finance/routes.py, since
     # each recurring rule accumulates one row per month it's been active.
-    recurring_rows = Transaction.query.filter_by(user_id=uid, is_recurring=True).all()
+    recurring_rows = db.session.scalars(select(Transaction).filter_by(user_id=uid, is_recurring=True)).all()
     templates_by_key: dict[tuple[str, str], Transaction] = {}
     for t in recurring_rows:
         key = (t.description, t.type)
@@ -345,16 +349,16 @@ def calendar_page():
     # Notes due within the visible window — due_date is a plain Date
     # column, so it compares directly against fetch_start/fetch_end
     # (the date objects, not the _dt datetimes built for Transaction).
-    notes_due = (
-        Note.query.filter(
+    notes_due = db.session.scalars(
+        select(Note)
+        .where(
             Note.user_id == uid,
             Note.due_date.isnot(None),
             Note.due_date >= fetch_start,
             Note.due_date <= fetch_end,
         )
         .order_by(Note.pinned.desc(), Note.due_date.asc(), Note.id.asc())
-        .all()
-    )
+    ).all()
     notes_by_date = defaultdict(list)
     for n in notes_due:
         notes_by_date[n.due_date.strftime("%Y-%m-%d")].append(n)
@@ -363,15 +367,15 @@ def calendar_page():
     # of their start time, same as Transaction's by_date above (an event
     # spanning midnight isn't split across two days, matches how a
     # Transaction dot works too).
-    events = (
-        Event.query.filter(
+    events = db.session.scalars(
+        select(Event)
+        .where(
             Event.user_id == uid,
             Event.start >= fetch_start_dt,
             Event.start < fetch_end_dt,
         )
         .order_by(Event.start.asc())
-        .all()
-    )
+    ).all()
     events_by_date = defaultdict(list)
     for e in events:
         events_by_date[e.start.strftime("%Y-%m-%d")].append(e)
@@ -476,6 +480,12 @@ def calendar_page():
 # anywhere else in this app).
 # ---------------------------------------------------------------------------
 
+def _get_owned_event(event_id: int) -> Event | None:
+    """Same owner-scoped lookup as _get_owned_note() in notes/routes.py —
+    someone else's event is a 404, not a 403."""
+    return db.session.scalar(select(Event).filter_by(id=event_id, user_id=current_user.id))
+
+
 def _serialize_event(event: Event) -> dict:
     return {
         "id": event.id,
@@ -535,11 +545,9 @@ def create_event():
 @dashboard_bp.route("/calendar/events/<int:event_id>", methods=["PATCH"])
 @login_required
 def update_event(event_id):
-    event = db.session.get(Event, event_id)
+    event = _get_owned_event(event_id)
     if event is None:
         return jsonify({"message": "Not found"}), 404
-    if event.user_id != current_user.id:
-        return jsonify({"message": "Unauthorized"}), 403
 
     data = request.get_json(silent=True) or {}
 
@@ -583,11 +591,9 @@ def update_event(event_id):
 @dashboard_bp.route("/calendar/events/<int:event_id>/delete", methods=["POST"])
 @login_required
 def delete_event(event_id):
-    event = db.session.get(Event, event_id)
+    event = _get_owned_event(event_id)
     if event is None:
         return jsonify({"message": "Not found"}), 404
-    if event.user_id != current_user.id:
-        return jsonify({"message": "Unauthorized"}), 403
 
     try:
         db.session.delete(event)
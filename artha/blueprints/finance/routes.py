@@ -10,16 +10,25 @@ from decimal import Decimal, InvalidOperation
 
 from flask import render_template, redirect, url_for, request, flash, session, jsonify, Response
 from flask_login import login_required, current_user
-from sqlalchemy import func
+from sqlalchemy import func, insert, select, update
 
 from ...extensions import db
 from ...models import Transaction
 from ...models.budget import Budget
-from ...utils import is_ajax_request, current_month_bounds, budget_status
+from ...services.finance_totals_service import account_inserted, apply_delta, get_month_totals, month_key
+from ...utils import (
+    is_ajax_request, current_month_bounds, budget_status, insert_shifting_positions, next_position,
+    shift_positions, supports_dml_cte, undo_expired,
+)
 from . import finance_bp
 
 log = logging.getLogger(__name__)
 
+# Undo snapshots carry the deleted row's timestamp as integer microseconds
+# since this epoch — exact both ways, unlike a float of seconds.
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
 
 # ---------------------------------------------------------------------------
 # Validation helpers
@@ -59,6 +68,52 @@ def _resolve_transaction_timestamp(date_str: str | None) -> datetime:
     return datetime(parsed.year, parsed.month, parsed.day, 12, 0, 0, tzinfo=timezone.utc)
 
 
+def _get_owned_transaction(transaction_id: int) -> Transaction | None:
+    """The current user's transaction with this id, or None. Ownership is
+    part of the WHERE clause, so another user's row is a plain 404 rather
+    than a 403 that confirms the id exists."""
+    return db.session.scalar(select(Transaction).filter_by(id=transaction_id, user_id=current_user.id))
+
+
+def _bulk_add_transactions(uid: int, rows: list[dict]) -> list[Transaction]:
+    """
+    Insert many transactions for one user in a single executemany and
+    return them — the groundwork for CSV/batch import, and usable from
+    tests and seeding scripts meanwhile. Each row needs
+    description/amount/type; timestamp and is_recurring are optional. Rows
+    are appended after the user's current highest position, in the order
+    given.
+
+    Nothing is committed: the caller owns the transaction, so an import
+    that fails halfway rolls back rows and totals together. A bulk INSERT
+    skips the flush, and with it the UserFinance hook, so the returned rows
+    are handed to account_inserted, which counts them the same way.
+    """
+    if not rows:
+        return []
+
+    last_pos = db.session.scalar(
+        select(func.coalesce(func.max(Transaction.position), 0)).where(Transaction.user_id == uid)
+    )
+    now = datetime.now(timezone.utc)
+    params = []
+    for offset, row in enumerate(rows, start=1):
+        # Every dict carries the same keys — executemany binds them all
+        # against the first row's column list.
+        params.append({
+            "is_recurring": False,
+            "timestamp": now,
+            **row,
+            "amount": Decimal(str(row["amount"])),
+            "user_id": uid,
+            "position": last_pos + offset,
+        })
+
+    inserted = db.session.scalars(insert(Transaction).returning(Transaction), params).all()
+    account_inserted(db.session, inserted)
+    return inserted
+
+
 # ---------------------------------------------------------------------------
 # Routes
 # ---------------------------------------------------------------------------
@@ -90,18 +145,12 @@ def add_transaction():
         flash(msg, "error")
         return redirect(url_for("dashboard.index"))
 
-    max_pos = (
-        db.session.query(func.max(Transaction.position))
-        .filter_by(user_id=current_user.id)
-        .scalar()
-        or 0
-    )
     new_tx = Transaction(
         description=description,
         amount=amount,
         type=t_type,
         user_id=current_user.id,
-        position=int(max_pos) + 1,
+        position=next_position(Transaction, current_user.id),
         timestamp=_resolve_transaction_timestamp(request.form.get("date")),
         is_recurring=bool(request.form.get("is_recurring")),
     )
@@ -130,11 +179,9 @@ def add_transaction():
 @finance_bp.route("/update_transaction/<int:transaction_id>", methods=["POST"])
 @login_required
 def update_transaction(transaction_id):
-    tx = db.session.get(Transaction, transaction_id)
+    tx = _get_owned_transaction(transaction_id)
     if tx is None:
         return jsonify({"message": "Not found"}), 404
-    if tx.user_id != current_user.id:
-        return jsonify({"message": "Unauthorized"}), 403
 
     data = request.get_json(silent=True) or {}
     desc = (data.get("description") or tx.description).strip()
@@ -177,18 +224,16 @@ def update_transaction(transaction_id):
 @finance_bp.route("/delete_transaction/<int:transaction_id>", methods=["POST"])
 @login_required
 def delete_transaction(transaction_id):
-    tx = db.session.get(Transaction, transaction_id)
+    tx = _get_owned_transaction(transaction_id)
     if tx is None:
         if is_ajax_request():
             return jsonify({"message": "Not found"}), 404
         flash("Transaction not found", "error")
         return redirect(url_for("dashboard.index"))
 
-    if tx.user_id != current_user.id:
-        if is_ajax_request():
-            return jsonify({"message": "Unauthorized"}), 403
-        flash("Unauthorized", "error")
-        return redirect(url_for("dashboard.index"))
+    # Stored naive-UTC, so pin the zone before taking the epoch; the
+    # fallback is only built when there's no timestamp at all.
+    ts_value = tx.timestamp or datetime.now(timezone.utc)
 
     # Store as string — Decimal is not JSON-serialisable
     session["last_deleted_tx"] = {
@@ -198,11 +243,10 @@ def delete_transaction(transaction_id):
         "type": tx.type,
         "position": int(tx.position or 0),
         "is_recurring": bool(tx.is_recurring),
-        "timestamp": (
-            tx.timestamp.replace(tzinfo=timezone.utc).isoformat()
-            if tx.timestamp
-            else datetime.now(timezone.utc).isoformat()
-        ),
+        # UTC epoch microseconds rather than an ISO string — restoring is
+        # then integer arithmetic instead of a string parse, and keeps the
+        # sub-second part a seconds-only int would have dropped.
+        "timestamp_us": (ts_value.replace(tzinfo=timezone.utc) - _EPOCH) // _MICROSECOND,
         "deleted_at": time.time(),
     }
 
@@ -217,12 +261,16 @@ def delete_transaction(transaction_id):
         # not just "remove this one instance" — clear the flag on every
         # other row sharing this key too.
         if tx.is_recurring:
-            Transaction.query.filter(
-                Transaction.user_id == tx.user_id,
-                Transaction.description == tx.description,
-                Transaction.type == tx.type,
-                Transaction.id != tx.id,
-            ).update({"is_recurring": False})
+            db.session.execute(
+                update(Transaction)
+                .where(
+                    Transaction.user_id == tx.user_id,
+                    Transaction.description == tx.description,
+                    Transaction.type == tx.type,
+                    Transaction.id != tx.id,
+                )
+                .values(is_recurring=False)
+            )
         db.session.delete(tx)
         db.session.commit()
         if is_ajax_request():
@@ -246,45 +294,44 @@ def undo_delete_transaction():
     if not data or data.get("user_id") != current_user.id:
         return jsonify({"message": "Nothing to undo."}), 400
 
-    if time.time() - float(data.get("deleted_at", 0)) > 10:
+    if undo_expired(data):
         session.pop("last_deleted_tx", None)
         return jsonify({"message": "Undo window expired."}), 400
 
     try:
-        ts = None
-        try:
-            ts = datetime.fromisoformat(data["timestamp"].replace("Z", "+00:00"))
-        except Exception:
-            ts = None
-
+        raw_ts = data.get("timestamp_us")
+        ts = _EPOCH + raw_ts * _MICROSECOND if isinstance(raw_ts, int) else None
+
+        fields = {
+            "description": data["description"],
+            "amount": Decimal(data["amount"]),
+            "type": data["type"],
+            "is_recurring": bool(data.get("is_recurring")),
+        }
         restored_pos = int(data.get("position") or 0)
-        if restored_pos <= 0:
-            max_pos = (
-                db.session.query(func.max(Transaction.position))
-                .filter_by(user_id=current_user.id)
-                .scalar()
-                or 0
-            )
-            restored_pos = int(max_pos) + 1
+        if restored_pos > 0 and supports_dml_cte():
+            if ts is not None:
+                fields["timestamp"] = ts
+            restored = insert_shifting_positions(Transaction, current_user.id, restored_pos, fields)
+            # Core INSERT, so the UserFinance flush hook never sees it.
+            apply_delta(db.session, current_user.id, month_key(ts), fields["type"], fields["amount"])
         else:
-            Transaction.query.filter(
-                Transaction.user_id == current_user.id,
-                Transaction.position >= restored_pos,
-            ).update(
-                {Transaction.position: Transaction.position + 1},
-                synchronize_session=False,
+            if restored_pos <= 0:
+                restored_pos = next_position(Transaction, current_user.id)
+            else:
+                db.session.execute(
+                    shift_positions(Transaction, current_user.id, restored_pos)
+                    .execution_options(synchronize_session=False)
+                )
+
+            restored = Transaction(
+                user_id=current_user.id,
+                position=restored_pos,
+                timestamp=ts or db.func.current_timestamp(),
+                **fields,
             )
+            db.session.add(restored)
 
-        restored = Transaction(
-            description=data["description"],
-            amount=Decimal(data["amount"]),
-            type=data["type"],
-            user_id=current_user.id,
-            position=restored_pos,
-            timestamp=ts or db.func.current_timestamp(),
-            is_recurring=bool(data.get("is_recurring")),
-        )
-        db.session.add(restored)
         db.session.commit()
         session.pop("last_deleted_tx", None)
 
@@ -303,11 +350,9 @@ def undo_delete_transaction():
 @finance_bp.route("/finance/transaction/<int:transaction_id>/toggle-recurring", methods=["PATCH"])
 @login_required
 def toggle_recurring(transaction_id):
-    tx = db.session.get(Transaction, transaction_id)
+    tx = _get_owned_transaction(transaction_id)
     if tx is None:
         return jsonify({"message": "Not found"}), 404
-    if tx.user_id != current_user.id:
-        return jsonify({"message": "Unauthorized"}), 403
 
     tx.is_recurring = not tx.is_recurring
 
@@ -339,7 +384,7 @@ def generate_recurring():
         1 if today.month == 12 else today.month + 1,
     )
 
-    recurring_txs = Transaction.query.filter_by(user_id=uid, is_recurring=True).all()
+    recurring_txs = db.session.scalars(select(Transaction).filter_by(user_id=uid, is_recurring=True)).all()
 
     # Recurring transactions accumulate one row per month (each generated
     # copy stays is_recurring=True so it keeps showing the recurring UI).
@@ -353,18 +398,17 @@ def generate_recurring():
         if current is None or (tx.timestamp and current.timestamp and tx.timestamp > current.timestamp):
             templates_by_key[key] = tx
 
-    existing_this_month = Transaction.query.filter(
-        Transaction.user_id == uid,
-        Transaction.timestamp >= month_start,
-        Transaction.timestamp < next_month_start,
+    existing_this_month = db.session.scalars(
+        select(Transaction).where(
+            Transaction.user_id == uid,
+            Transaction.timestamp >= month_start,
+            Transaction.timestamp < next_month_start,
+        )
     ).all()
     existing_keys = {(t.description, t.type) for t in existing_this_month}
 
-    max_pos = (
-        db.session.query(func.max(Transaction.position))
-        .filter_by(user_id=uid)
-        .scalar()
-        or 0
+    max_pos = db.session.scalar(
+        select(func.coalesce(func.max(Transaction.position), 0)).filter_by(user_id=uid)
     )
 
     generated = 0
@@ -415,12 +459,13 @@ def generate_recurring():
 @login_required
 def finance_totals():
     """
-    Direct DB query — the in-memory cache has been removed.
+    Reads the month's maintained UserFinance row (see
+    artha/services/finance_totals_service.py) — no in-memory cache.
 
     Why: the old `finance_cache = {}` was a module-level dict that breaks
     under Gunicorn multi-worker deployments (each worker has its own copy).
-    A single PostgreSQL aggregate query is fast enough for one user's data
-    and is always correct across all workers.
+    The running totals live in the database instead, so every worker sees
+    the same figures.
 
     Scoped to the current month, same as the dashboard route that renders
     the cards this endpoint refreshes — this is only ever called to
@@ -429,37 +474,24 @@ def finance_totals():
     on load, not sum all-time totals back in.
     """
     uid = current_user.id
-    month_start, month_end = current_month_bounds()
+    month_start, _ = current_month_bounds()
 
-    income = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter(
-            Transaction.user_id == uid,
-            Transaction.type == "income",
-            Transaction.timestamp >= month_start,
-            Transaction.timestamp < month_end,
-        )
-        .scalar()
-        or Decimal("0")
-    )
-    expense = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter(
-            Transaction.user_id == uid,
-            Transaction.type == "expense",
-            Transaction.timestamp >= month_start,
-            Transaction.timestamp < month_end,
-        )
-        .scalar()
-        or Decimal("0")
-    )
+    income, expense = get_month_totals(uid, month_start)
     balance = income - expense
 
-    return jsonify({
+    response = jsonify({
         "income": float(income),
         "expense": float(expense),
         "balance": float(balance),
     })
+    # The browser revalidates on every poll (no-cache) and gets a bodyless
+    # 304 back whenever the totals haven't moved since its last copy. The
+    # tag covers user + month as well as the figures themselves, since the
+    # same URL serves every user and rolls over at month end.
+    response.set_etag(f"{uid}:{month_start:%Y-%m}:{income:.2f}:{expense:.2f}")
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 # ---------------------------------------------------------------------------
@@ -495,11 +527,11 @@ def finance_page():
         (none)          — defaults to the current month
     """
     uid = current_user.id
-    all_tx = (
-        Transaction.query.filter_by(user_id=uid)
+    all_tx = db.session.scalars(
+        select(Transaction)
+        .filter_by(user_id=uid)
         .order_by(Transaction.timestamp.asc(), Transaction.id.asc())
-        .all()
-    )
+    ).all()
 
     today = date.today()
     month_param = (request.args.get("month") or "").strip()
@@ -634,13 +666,13 @@ def finance_page():
     # Distinct recurring "rules" (by description + type), not a raw row
     # count — each rule accumulates one generated row per month, so a raw
     # count would grow every month even though nothing new was configured.
-    recurring_rows = Transaction.query.filter_by(user_id=uid, is_recurring=True).all()
+    recurring_rows = db.session.scalars(select(Transaction).filter_by(user_id=uid, is_recurring=True)).all()
     recurring_count = len({(t.description, t.type) for t in recurring_rows})
 
     # Always the real current month's spend, independent of whatever month
     # is being browsed above — "my budget" means this calendar month, not
     # whichever one the filter tabs happen to be showing.
-    budget_row = Budget.query.filter_by(user_id=uid).first()
+    budget_row = db.session.scalar(select(Budget).filter_by(user_id=uid))
     current_month_expense = bucket_for(_month_start(today.year, today.month))["expense"]
     budget = budget_status(budget_row.monthly_cap if budget_row else None, current_month_expense)
 
@@ -681,7 +713,7 @@ def export_csv():
     month_param = (request.args.get("month") or "").strip()
     all_time = month_param == "all"
 
-    query = Transaction.query.filter_by(user_id=uid)
+    stmt = select(Transaction).filter_by(user_id=uid)
     if all_time:
         filename_part = "all-time"
     elif month_param:
@@ -695,7 +727,7 @@ def export_csv():
             if selected_date.month == 12
             else _month_start(selected_date.year, selected_date.month + 1)
         )
-        query = query.filter(
+        stmt = stmt.where(
             Transaction.timestamp >= selected_date,
             Transaction.timestamp < next_month,
         )
@@ -706,13 +738,13 @@ def export_csv():
         next_month = (
             _month_start(today.year + 1, 1) if today.month == 12 else _month_start(today.year, today.month + 1)
         )
-        query = query.filter(
+        stmt = stmt.where(
             Transaction.timestamp >= selected_date,
             Transaction.timestamp < next_month,
         )
         filename_part = selected_date.strftime("%Y-%m")
 
-    rows = query.order_by(Transaction.timestamp.asc(), Transaction.id.asc()).all()
+    rows = db.session.scalars(stmt.order_by(Transaction.timestamp.asc(), Transaction.id.asc())).all()
 
     buffer = io.StringIO()
     writer = csv.writer(buffer)
@@ -743,7 +775,7 @@ def set_budget():
         flash(str(exc), "error")
         return redirect(url_for("finance.finance_page"))
 
-    row = Budget.query.filter_by(user_id=current_user.id).first()
+    row = db.session.scalar(select(Budget).filter_by(user_id=current_user.id))
     if row is None:
         row = Budget(user_id=current_user.id, monthly_cap=cap)
         db.session.add(row)
@@ -4,11 +4,14 @@ from datetime import datetime
 
 from flask import render_template, redirect, url_for, request, flash, session, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import func
+from sqlalchemy import case, select, update
 
 from ...extensions import db
 from ...models import Note
-from ...utils import is_ajax_request, derive_title_and_preview
+from ...utils import (
+    is_ajax_request, derive_title_and_preview, insert_shifting_positions, next_position, shift_positions,
+    supports_dml_cte, undo_expired,
+)
 from . import notes_bp
 
 log = logging.getLogger(__name__)
@@ -32,6 +35,13 @@ def _serialize_note(note):
     }
 
 
+def _get_owned_note(note_id):
+    """The current user's note with this id, or None — someone else's note
+    is indistinguishable from a missing one (404, not 403), and the
+    ownership check rides along in the one WHERE clause."""
+    return db.session.scalar(select(Note).filter_by(id=note_id, user_id=current_user.id))
+
+
 def _parse_due_date(raw):
     """Parse an ISO date string from the client, returning None for
     blank/missing input and silently ignoring malformed input — autosave
@@ -55,19 +65,13 @@ def notes_page():
             flash("Note content is required.", "error")
             return redirect(url_for("notes.notes_page"))
 
-        max_pos = (
-            db.session.query(func.max(Note.position))
-            .filter_by(user_id=current_user.id)
-            .scalar()
-            or 0
-        )
         derived_title, preview = derive_title_and_preview(content)
         new_note = Note(
             title=title or derived_title,
             content=content,
             preview=preview,
             user_id=current_user.id,
-            position=int(max_pos) + 1,
+            position=next_position(Note, current_user.id),
         )
 
         try:
@@ -81,14 +85,14 @@ def notes_page():
 
         return redirect(url_for("notes.notes_page"))
 
-    notes = (
-        Note.query.filter_by(user_id=current_user.id)
+    notes = db.session.scalars(
+        select(Note)
+        .filter_by(user_id=current_user.id)
         # Newest first (by creation order) rather than oldest first —
         # matches Keep/Notes/Notion convention so a just-created note is
         # immediately visible without scrolling past everything else.
         .order_by(Note.pinned.desc(), Note.position.desc(), Note.id.desc())
-        .all()
-    )
+    ).all()
     pinned_notes = [n for n in notes if n.pinned]
     other_notes = [n for n in notes if not n.pinned]
     return render_template(
@@ -103,19 +107,13 @@ def notes_page():
 @notes_bp.route("/notes/new", methods=["POST"])
 @login_required
 def new_note():
-    max_pos = (
-        db.session.query(func.max(Note.position))
-        .filter_by(user_id=current_user.id)
-        .scalar()
-        or 0
-    )
     derived_title, preview = derive_title_and_preview("")
     note = Note(
         title=derived_title,
         content="",
         preview=preview,
         user_id=current_user.id,
-        position=int(max_pos) + 1,
+        position=next_position(Note, current_user.id),
     )
     try:
         db.session.add(note)
@@ -133,11 +131,9 @@ def new_note():
 @notes_bp.route("/notes/<int:note_id>", methods=["GET"])
 @login_required
 def get_note(note_id):
-    note = db.session.get(Note, note_id)
+    note = _get_owned_note(note_id)
     if note is None:
         return jsonify({"message": "Not found"}), 404
-    if note.user_id != current_user.id:
-        return jsonify({"message": "Unauthorized"}), 403
 
     return jsonify({
         **_serialize_note(note),
@@ -148,11 +144,9 @@ def get_note(note_id):
 @notes_bp.route("/notes/<int:note_id>/update", methods=["PATCH"])
 @login_required
 def update_note_fields(note_id):
-    note = db.session.get(Note, note_id)
+    note = _get_owned_note(note_id)
     if note is None:
         return jsonify({"message": "Not found"}), 404
-    if note.user_id != current_user.id:
-        return jsonify({"message": "Unauthorized"}), 403
 
     data = request.get_json(silent=True) or {}
 
@@ -219,11 +213,9 @@ def update_note_fields(note_id):
 @notes_bp.route("/update_note/<int:note_id>", methods=["POST"])
 @login_required
 def update_note(note_id):
-    note = db.session.get(Note, note_id)
+    note = _get_owned_note(note_id)
     if note is None:
         return jsonify({"message": "Not found"}), 404
-    if note.user_id != current_user.id:
-        return jsonify({"message": "Unauthorized"}), 403
 
     data = request.get_json(silent=True) or {}
     content = (data.get("content") or "").strip()
@@ -254,21 +246,29 @@ def reorder_notes():
     except Exception:
         return jsonify({"message": "Order must be a list of integers."}), 400
 
-    notes = Note.query.filter(
-        Note.user_id == current_user.id, Note.id.in_(ids)
-    ).all()
-
-    if {n.id for n in notes} != set(ids):
-        return jsonify({"message": "Order contains unknown or unauthorized note ids."}), 403
-
     # notes_page() sorts position DESC (newest/most-recently-arranged
     # first), so the first id in the submitted order — the top card —
-    # must get the *highest* position, not the lowest.
-    id_to_note = {n.id: n for n in notes}
-    for idx, note_id in enumerate(ids):
-        id_to_note[note_id].position = len(ids) - idx
+    # must get the *highest* position, not the lowest. One CASE UPDATE
+    # instead of loading every note and flushing a row-by-row UPDATE.
+    new_positions = case(
+        {note_id: len(ids) - idx for idx, note_id in enumerate(ids)},
+        value=Note.id,
+    )
 
     try:
+        updated = db.session.execute(
+            update(Note)
+            .where(Note.user_id == current_user.id, Note.id.in_(ids))
+            .values({Note.position: new_positions})
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        # The user_id filter doubles as the ownership check: any id that
+        # isn't this user's (or doesn't exist) simply doesn't match.
+        if updated != len(set(ids)):
+            db.session.rollback()
+            return jsonify({"message": "Order contains unknown or unauthorized note ids."}), 403
+
         db.session.commit()
         return jsonify({"message": "Note order saved."})
     except Exception as e:
@@ -280,19 +280,13 @@ def reorder_notes():
 @notes_bp.route("/delete_note/<int:note_id>", methods=["POST"])
 @login_required
 def delete_note(note_id):
-    note = db.session.get(Note, note_id)
+    note = _get_owned_note(note_id)
     if note is None:
         if is_ajax_request():
             return jsonify({"message": "Not found"}), 404
         flash("Note not found", "error")
         return redirect(url_for("dashboard.index"))
 
-    if note.user_id != current_user.id:
-        if is_ajax_request():
-            return jsonify({"message": "Unauthorized"}), 403
-        flash("Unauthorized action", "error")
-        return redirect(url_for("dashboard.index"))
-
     session["last_deleted_note"] = {
         "user_id": note.user_id,
         "title": note.title,
@@ -330,38 +324,35 @@ def undo_delete_note():
     if not data or data.get("user_id") != current_user.id:
         return jsonify({"message": "Nothing to undo."}), 400
 
-    if time.time() - float(data.get("deleted_at", 0)) > 10:
+    if undo_expired(data):
         session.pop("last_deleted_note", None)
         return jsonify({"message": "Undo window expired."}), 400
 
     try:
+        fields = {
+            "title": data.get("title"),
+            "content": data["content"],
+            "preview": data.get("preview"),
+            "pinned": bool(data.get("pinned")),
+            "color": data.get("color"),
+            "tag": data.get("tag"),
+            "due_date": _parse_due_date(data.get("due_date")),
+        }
         restored_pos = int(data.get("position") or 0)
-        if restored_pos <= 0:
-            max_pos = (
-                db.session.query(func.max(Note.position))
-                .filter_by(user_id=current_user.id)
-                .scalar()
-                or 0
-            )
-            restored_pos = int(max_pos) + 1
+        if restored_pos > 0 and supports_dml_cte():
+            restored = insert_shifting_positions(Note, current_user.id, restored_pos, fields)
         else:
-            Note.query.filter(
-                Note.user_id == current_user.id,
-                Note.position >= restored_pos,
-            ).update({Note.position: Note.position + 1}, synchronize_session=False)
-
-        restored = Note(
-            title=data.get("title"),
-            content=data["content"],
-            preview=data.get("preview"),
-            user_id=current_user.id,
-            position=restored_pos,
-            pinned=bool(data.get("pinned")),
-            color=data.get("color"),
-            tag=data.get("tag"),
-            due_date=_parse_due_date(data.get("due_date")),
-        )
-        db.session.add(restored)
+            if restored_pos <= 0:
+                restored_pos = next_position(Note, current_user.id)
+            else:
+                db.session.execute(
+                    shift_positions(Note, current_user.id, restored_pos)
+                    .execution_options(synchronize_session=False)
+                )
+
+            restored = Note(user_id=current_user.id, position=restored_pos, **fields)
+            db.session.add(restored)
+
         db.session.commit()
         session.pop("last_deleted_note", None)
 
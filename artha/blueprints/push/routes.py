@@ -2,6 +2,7 @@ import logging
 
 from flask import jsonify, request
 from flask_login import current_user, login_required
+from sqlalchemy import select
 
 from ...extensions import csrf, db
 from ...models.push_subscription import PushSubscription
@@ -36,7 +37,7 @@ def subscribe():
     if not endpoint or not p256dh or not auth:
         return jsonify({"message": "Invalid subscription"}), 400
 
-    row = PushSubscription.query.filter_by(endpoint=endpoint).first()
+    row = db.session.scalar(select(PushSubscription).filter_by(endpoint=endpoint))
     if row is None:
         row = PushSubscription(user_id=current_user.id, endpoint=endpoint, p256dh=p256dh, auth=auth)
         db.session.add(row)
@@ -63,7 +64,9 @@ def unsubscribe():
     data = request.get_json(silent=True) or {}
     endpoint = (data.get("endpoint") or "").strip()
 
-    row = PushSubscription.query.filter_by(endpoint=endpoint, user_id=current_user.id).first()
+    row = db.session.scalar(
+        select(PushSubscription).filter_by(endpoint=endpoint, user_id=current_user.id)
+    )
     if row is not None:
         db.session.delete(row)
         db.session.commit()
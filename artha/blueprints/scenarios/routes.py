@@ -4,11 +4,11 @@ from decimal import Decimal, InvalidOperation
 
 from flask import abort, flash, jsonify, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
-from sqlalchemy import func
+from sqlalchemy import select
 
 from ...extensions import db
-from ...models import Transaction
 from ...models.scenario import VALID_PRIORITIES, VALID_STATUSES, Scenario
+from ...services.finance_totals_service import sum_income_expense
 from ...utils import is_ajax_request
 from . import scenarios_bp
 
@@ -57,37 +57,13 @@ def _parse_date(raw, field_name: str):
         raise ValidationError(f"{field_name} must be a valid date (YYYY-MM-DD).")
 
 
-def _monthly_income(user_id: int, months: int = 3) -> Decimal:
-    """Average monthly income over the trailing N months of transaction history."""
+def _monthly_averages(user_id: int, months: int = 3) -> tuple[Decimal, Decimal]:
+    """Average monthly (income, expense) over the trailing N months of
+    transaction history — the projected-month fallback when the target
+    month has no real data yet."""
     since = datetime.utcnow() - timedelta(days=30 * months)
-    total = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter(
-            Transaction.user_id == user_id,
-            Transaction.type == "income",
-            Transaction.timestamp >= since,
-        )
-        .scalar()
-        or Decimal("0")
-    )
-    return Decimal(total) / months
-
-
-def _monthly_expense(user_id: int, months: int = 3) -> Decimal:
-    """Average monthly expense over the trailing N months — the expense-side
-    twin of _monthly_income(), used for the same projected-month fallback."""
-    since = datetime.utcnow() - timedelta(days=30 * months)
-    total = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter(
-            Transaction.user_id == user_id,
-            Transaction.type == "expense",
-            Transaction.timestamp >= since,
-        )
-        .scalar()
-        or Decimal("0")
-    )
-    return Decimal(total) / months
+    income, expense = sum_income_expense(user_id, since)
+    return income / months, expense / months
 
 
 def _month_totals(user_id: int, target: date) -> dict:
@@ -103,28 +79,7 @@ def _month_totals(user_id: int, target: date) -> dict:
     start = date(target.year, target.month, 1)
     next_month = date(target.year + 1, 1, 1) if target.month == 12 else date(target.year, target.month + 1, 1)
 
-    income = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter(
-            Transaction.user_id == user_id,
-            Transaction.type == "income",
-            Transaction.timestamp >= start,
-            Transaction.timestamp < next_month,
-        )
-        .scalar()
-        or Decimal("0")
-    )
-    expense = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter(
-            Transaction.user_id == user_id,
-            Transaction.type == "expense",
-            Transaction.timestamp >= start,
-            Transaction.timestamp < next_month,
-        )
-        .scalar()
-        or Decimal("0")
-    )
+    income, expense = sum_income_expense(user_id, start, next_month)
     return {
         "month_start": start,
         "income": income,
@@ -148,8 +103,7 @@ def _scenario_month_comparison(scenario: Scenario) -> dict:
     totals = _month_totals(scenario.user_id, target)
 
     if not totals["has_data"]:
-        avg_income = _monthly_income(scenario.user_id)
-        avg_expense = _monthly_expense(scenario.user_id)
+        avg_income, avg_expense = _monthly_averages(scenario.user_id)
         totals = {
             "month_start": date(target.year, target.month, 1),
             "income": avg_income,
@@ -274,9 +228,13 @@ def _scenario_compare_payload(scenario: Scenario, verdict: dict) -> dict:
     }
 
 
+def _find_owned_scenario(scenario_id: int) -> Scenario | None:
+    return db.session.scalar(select(Scenario).filter_by(id=scenario_id, user_id=current_user.id))
+
+
 def _get_owned_scenario(scenario_id: int) -> Scenario:
-    scenario = db.session.get(Scenario, scenario_id)
-    if scenario is None or scenario.user_id != current_user.id:
+    scenario = _find_owned_scenario(scenario_id)
+    if scenario is None:
         abort(404)
     return scenario
 
@@ -330,10 +288,10 @@ def _apply_form(scenario: Scenario, form) -> None:
 def index():
     status_filter = (request.args.get("status") or "").strip()
 
-    query = Scenario.query.filter_by(user_id=current_user.id)
+    stmt = select(Scenario).filter_by(user_id=current_user.id)
     if status_filter in VALID_STATUSES:
-        query = query.filter_by(status=status_filter)
-    scenarios = query.order_by(Scenario.created_at.desc()).all()
+        stmt = stmt.filter_by(status=status_filter)
+    scenarios = db.session.scalars(stmt.order_by(Scenario.created_at.desc())).all()
 
     verdicts = {s.id: _verdict(s) for s in scenarios}
     compare_data = [_scenario_compare_payload(s, verdicts[s.id]) for s in scenarios]
@@ -384,11 +342,11 @@ def add():
 def detail(scenario_id):
     scenario = _get_owned_scenario(scenario_id)
 
-    scenarios = (
-        Scenario.query.filter_by(user_id=current_user.id)
+    scenarios = db.session.scalars(
+        select(Scenario)
+        .filter_by(user_id=current_user.id)
         .order_by(Scenario.created_at.desc())
-        .all()
-    )
+    ).all()
     verdicts = {s.id: _verdict(s) for s in scenarios}
     compare_data = [_scenario_compare_payload(s, verdicts[s.id]) for s in scenarios]
 
@@ -438,8 +396,8 @@ def edit(scenario_id):
 @scenarios_bp.route("/<int:scenario_id>/delete", methods=["POST"])
 @login_required
 def delete(scenario_id):
-    scenario = db.session.get(Scenario, scenario_id)
-    if scenario is None or scenario.user_id != current_user.id:
+    scenario = _find_owned_scenario(scenario_id)
+    if scenario is None:
         if is_ajax_request():
             return jsonify({"message": "Not found"}), 404
         flash("Scenario not found.", "error")
@@ -464,8 +422,8 @@ def delete(scenario_id):
 @scenarios_bp.route("/<int:scenario_id>/archive", methods=["POST"])
 @login_required
 def archive(scenario_id):
-    scenario = db.session.get(Scenario, scenario_id)
-    if scenario is None or scenario.user_id != current_user.id:
+    scenario = _find_owned_scenario(scenario_id)
+    if scenario is None:
         if is_ajax_request():
             return jsonify({"message": "Not found"}), 404
         flash("Scenario not found.", "error")
@@ -498,11 +456,11 @@ def inject_scenario_widget_data():
     if not current_user.is_authenticated or request.endpoint != "dashboard.index":
         return {}
 
-    active = (
-        Scenario.query.filter_by(user_id=current_user.id, status="active")
+    active = db.session.scalars(
+        select(Scenario)
+        .filter_by(user_id=current_user.id, status="active")
         .order_by(Scenario.created_at.desc())
-        .all()
-    )
+    ).all()
     total_monthly_impact = sum((s.net_monthly_impact for s in active), Decimal("0"))
     top_three = active[:3]
 
@@ -23,6 +23,7 @@ from datetime import date
 
 import click
 from flask import current_app
+from sqlalchemy import select
 
 from .blueprints.dashboard.routes import _next_due_date
 from .extensions import db
@@ -40,7 +41,9 @@ def _due_today_items(user_id: int, today: date) -> list[str]:
     today. The notification doesn't need to distinguish *why* something's
     due, just *what* is, so both feed the same list rather than being
     tracked and formatted separately."""
-    recurring_rows = Transaction.query.filter_by(user_id=user_id, is_recurring=True).all()
+    recurring_rows = db.session.scalars(
+        select(Transaction).filter_by(user_id=user_id, is_recurring=True)
+    ).all()
     templates_by_key: dict[tuple[str, str], Transaction] = {}
     for t in recurring_rows:
         key = (t.description, t.type)
@@ -54,7 +57,7 @@ def _due_today_items(user_id: int, today: date) -> list[str]:
         if due == today:
             items.append(desc)
 
-    notes_due_today = Note.query.filter_by(user_id=user_id, due_date=today).all()
+    notes_due_today = db.session.scalars(select(Note).filter_by(user_id=user_id, due_date=today)).all()
     for note in notes_due_today:
         items.append(note.title or (note.preview[:40] if note.preview else "Untitled note"))
 
@@ -66,7 +69,7 @@ def register_cli(app):
     def send_renewal_reminders():
         """Push one reminder to each subscribed user with a bill or note due today."""
         today = date.today()
-        subs = PushSubscription.query.all()
+        subs = db.session.scalars(select(PushSubscription)).all()
 
         by_user: dict[int, list[PushSubscription]] = {}
         for sub in subs:
@@ -1,14 +1,17 @@
+from flask_compress import Compress
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from sqlalchemy import event
 
 db = SQLAlchemy()
 login_manager = LoginManager()
 migrate = Migrate()
 csrf = CSRFProtect()
+compress = Compress()
 # No global default_limits — applied per-route only (login for now), so
 # every other endpoint is unaffected. In-memory storage: fine for this
 # app's scale, but note it's per-process, so if the web service ever runs
@@ -16,3 +19,32 @@ csrf = CSRFProtect()
 # count) since each worker tracks its own counts. A shared store (Redis)
 # would fix that, not worth the added infra for a handful of users.
 limiter = Limiter(key_func=get_remote_address)
+
+
+def init_sqlite_pragmas(app) -> None:
+    """Local/dev SQLite only: hooks this app's own engine(s), so Postgres —
+    and any other engine in the process — is left alone. WAL lets page
+    reads carry on while a write (reorder, delete, undo) is in progress
+    instead of blocking on the whole-file lock, and NORMAL synchronous is
+    the recommended pairing with WAL — still crash-safe, just without an
+    fsync on every commit. The rest keep hot pages in memory: temp
+    tables/sorts in RAM, reads through a memory map instead of read()
+    syscalls, and a page cache of SQLITE_CACHE_SIZE_KIB per connection in
+    place of the ~2 MiB default."""
+    cache_kib = app.config["SQLITE_CACHE_SIZE_KIB"]
+
+    def _set_pragmas(dbapi_conn, _connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        # Negative = size in KiB rather than in pages.
+        cursor.execute(f"PRAGMA cache_size=-{int(cache_kib)}")
+        cursor.close()
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _set_pragmas)
@@ -0,0 +1,27 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask's default JSON provider with orjson doing the encoding/decoding.
+    Every jsonify() call, the tojson template filter and request.get_json()
+    go through app.json, so this swaps the serializer app-wide without
+    touching any route.
+
+    Output is kept identical to the stdlib provider's: keys sorted,
+    datetimes/dates handed back to Flask's own default() (HTTP-date
+    strings, not orjson's native ISO format), Decimal stringified, and the
+    indented form still used in debug mode.
+    """
+
+    _OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = self._OPTIONS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
@@ -8,7 +8,9 @@ from .event import Event
 from .feedback import Feedback
 from .budget import Budget
 from .push_subscription import PushSubscription
+from .user_finance import UserFinance
 
 __all__ = [
     "User", "Note", "Transaction", "ExchangeRate", "Event", "Feedback", "Budget", "PushSubscription",
+    "UserFinance",
 ]
@@ -3,18 +3,38 @@ from ..extensions import db
 
 class Transaction(db.Model):
     __tablename__ = "transaction"
+    # Every hot query is scoped to one user first — the dashboard/undo
+    # paths then order or shift by position, the totals aggregate by type,
+    # and the month lists/sums range-scan timestamp — so user_id leads
+    # every index instead of a bare position index that can't serve the
+    # user_id predicate.
+    __table_args__ = (
+        db.Index("ix_tx_user_position", "user_id", "position"),
+        db.Index("ix_tx_user_type", "user_id", "type"),
+        db.Index("ix_tx_user_ts", "user_id", "timestamp"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(255), nullable=False)
 
     # FIX: was db.Float — floats cannot represent money precisely.
     # Numeric(12, 2) stores exact decimal values up to $9,999,999,999.99.
-    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    #
+    # amount/type/timestamp/user_id decide which UserFinance row a
+    # transaction counts towards, so they're active_history: overwriting
+    # one that was never loaded (or was expired by a commit) loads the old
+    # value first, and the totals flush hook always has an exact "before"
+    # to subtract (see artha/services/finance_totals_service.py).
+    amount = db.column_property(db.Column(db.Numeric(12, 2), nullable=False), active_history=True)
 
-    type = db.Column(db.String(10), nullable=False)  # "income" | "expense"
-    timestamp = db.Column(db.DateTime, default=db.func.current_timestamp())
-    position = db.Column(db.Integer, nullable=False, default=0, index=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    type = db.column_property(db.Column(db.String(10), nullable=False), active_history=True)  # "income" | "expense"
+    timestamp = db.column_property(
+        db.Column(db.DateTime, default=db.func.current_timestamp()), active_history=True
+    )
+    position = db.Column(db.Integer, nullable=False, default=0)
+    user_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False), active_history=True
+    )
     is_recurring = db.Column(db.Boolean, nullable=False, default=False)
 
     def __repr__(self) -> str:
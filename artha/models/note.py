@@ -5,6 +5,9 @@ from ..extensions import db
 
 class Note(db.Model):
     __tablename__ = "note"
+    # Same shape as Transaction's: note lists and reorder/undo shifts are
+    # always "this user's notes by position".
+    __table_args__ = (db.Index("ix_note_user_position", "user_id", "position"),)
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=True)
@@ -14,9 +17,9 @@ class Note(db.Model):
     # client-side, so the list view can render it directly.
     preview = db.Column(db.Text, nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    position = db.Column(db.Integer, nullable=False, default=0, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
     pinned = db.Column(
-        db.Boolean, nullable=False, default=False, server_default=db.text("0")
+        db.Boolean, nullable=False, default=False, server_default=db.false()
     )
     # Small fixed vocabularies enforced in artha.blueprints.notes.routes
     # (NOTE_COLORS / NOTE_TAGS) rather than a DB enum, so the set can change
@@ -4,6 +4,13 @@ from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from ..extensions import db
 
+# hashlib.scrypt runs in OpenSSL's C code (and releases the GIL), unlike
+# the pure-Python-dispatched pbkdf2 loop older Werkzeug releases
+# defaulted to. Pinned explicitly so a future Werkzeug default change
+# can't silently switch what new hashes use — including the cost
+# parameters (N=2**15, r=8, p=1), not just the algorithm name.
+PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+
 
 class User(UserMixin, db.Model):
     __tablename__ = "user"
@@ -28,10 +35,18 @@ class User(UserMixin, db.Model):
     )
 
     def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
 
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
 
+    @property
+    def password_needs_rehash(self) -> bool:
+        """True for hashes made with anything other than PASSWORD_HASH_METHOD
+        (e.g. pbkdf2 from accounts registered under an older Werkzeug, or
+        scrypt at different cost parameters) — check_password_hash still
+        verifies those, they're just not what new hashes use."""
+        return not self.password_hash.startswith(f"{PASSWORD_HASH_METHOD}$")
+
     def __repr__(self) -> str:
         return f"<User {self.username}>"
@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from ..extensions import db
+
+
+class UserFinance(db.Model):
+    """
+    Running income/expense totals for one user's calendar month, kept in
+    step with every Transaction write (see
+    artha/services/finance_totals_service.py) so the dashboard cards and
+    /api/finance_totals read a single row instead of re-summing the month.
+
+    Keyed by (user, month) rather than one all-time row per user: every
+    consumer of these totals is scoped to a calendar month (see
+    current_month_bounds() in artha/utils.py), and an all-time figure
+    can't be turned back into a monthly one.
+    """
+
+    __tablename__ = "user_finance"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    # "YYYY-MM" — same bucket key finance_page() already groups by.
+    month = db.Column(db.String(7), primary_key=True)
+    income = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal("0"))
+    expense = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal("0"))
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    def __repr__(self) -> str:
+        return f"<UserFinance user={self.user_id} {self.month} +{self.income} -{self.expense}>"
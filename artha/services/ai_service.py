@@ -35,6 +35,9 @@ from anthropic import (
     APITimeoutError,
 )
 
+from sqlalchemy import select
+
+from ..extensions import db
 from ..models import Transaction
 
 log = logging.getLogger(__name__)
@@ -104,13 +107,12 @@ def _assemble_financial_context(user) -> str:
     Query the DB and return a structured text block describing the user's
     financial position. Injected into the system prompt on every request.
     """
-    transactions: list[Transaction] = (
-        Transaction.query
+    transactions: list[Transaction] = db.session.scalars(
+        select(Transaction)
         .filter_by(user_id=user.id)
         .order_by(Transaction.timestamp.desc())
         .limit(_MAX_CONTEXT_TRANSACTIONS)
-        .all()
-    )
+    ).all()
 
     if not transactions:
         return "No transactions recorded yet."
@@ -353,7 +355,7 @@ class AIService:
             return result
 
         # Build a structured summary for the UI to consume alongside the prose.
-        transactions = Transaction.query.filter_by(user_id=user.id).all()
+        transactions = db.session.scalars(select(Transaction).filter_by(user_id=user.id)).all()
         zero         = Decimal("0")
         total_income  = sum((t.amount for t in transactions if t.type == "income"),  zero)
         total_expense = sum((t.amount for t in transactions if t.type == "expense"), zero)
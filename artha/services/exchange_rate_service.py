@@ -33,6 +33,7 @@ import logging
 from datetime import datetime, timedelta, timezone
 
 import requests
+from sqlalchemy import select
 
 from ..extensions import db
 from ..models import ExchangeRate
@@ -66,7 +67,7 @@ def _row_to_dict(row: ExchangeRate) -> dict:
 def get_rates() -> dict | None:
     """Return {"base": ..., "rates": {...}, "fetched_at": ...}, or None if
     no cached data exists and a fresh fetch also failed."""
-    row = ExchangeRate.query.first()
+    row = db.session.scalar(select(ExchangeRate).limit(1))
 
     is_fresh = (
         row
@@ -0,0 +1,199 @@
+"""
+artha/services/finance_totals_service.py
+-----------------------------------------
+Monthly income/expense totals for the dashboard cards and
+/api/finance_totals, served from the UserFinance table rather than a
+SUM over the month's transactions on every read.
+
+Architecture decisions:
+  - Stored in the database, not an in-memory cache — same multi-worker
+    reason the old finance_cache dict was removed (see finance_totals() in
+    artha/blueprints/finance/routes.py) and the exchange-rate cache lives
+    in the DB too.
+  - Writers are authoritative. A session before_flush hook turns every
+    ORM insert/update/delete of a Transaction (routes, generate_recurring,
+    tests, scripts) into an exact delta and upserts it into the month's
+    row — INSERT ... ON CONFLICT DO UPDATE SET income = income + delta —
+    inside the writer's own DB transaction. A rolled-back write never
+    leaves the totals ahead of the data, and two concurrent writers just
+    add up in the database; there's no read-then-write window to lose a
+    write in. Writes that bypass the ORM unit-of-work must call
+    apply_delta() themselves.
+  - Readers never write: a month with no row simply has no transactions.
+    History from before the table existed was backfilled by its
+    migration (9e606abd4861).
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import case, event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..extensions import db
+from ..models import Transaction
+from ..models.user_finance import UserFinance
+
+log = logging.getLogger(__name__)
+
+_TRACKED = ("user_id", "type", "amount", "timestamp")
+_ZERO = Decimal("0")
+
+
+def month_key(ts) -> str:
+    """Bucket key for a Transaction.timestamp value. Anything that isn't a
+    datetime yet (None, or a db.func.current_timestamp() default still
+    waiting to be evaluated by the INSERT) lands in the current month, on
+    the same date.today() calendar current_month_bounds() and the /finance
+    month tabs use."""
+    if not isinstance(ts, datetime):
+        return date.today().strftime("%Y-%m")
+    return ts.strftime("%Y-%m")
+
+
+def _sum_by_type(t_type: str):
+    return func.coalesce(
+        func.sum(case((Transaction.type == t_type, Transaction.amount), else_=0)), 0
+    )
+
+
+def sum_income_expense(user_id: int, start, end=None) -> tuple[Decimal, Decimal]:
+    """(income, expense) summed straight from Transaction rows with
+    timestamp in [start, end) — or from `start` onward if end is None — in
+    one conditional-aggregation query rather than one SUM per type.
+    Always Decimals: the coalesce happens in SQL, so an empty range comes
+    back as 0 rather than NULL."""
+    filters = [Transaction.user_id == user_id, Transaction.timestamp >= start]
+    if end is not None:
+        filters.append(Transaction.timestamp < end)
+    income, expense = db.session.execute(
+        select(_sum_by_type("income"), _sum_by_type("expense")).where(*filters)
+    ).one()
+    return Decimal(income), Decimal(expense)
+
+
+def get_month_totals(user_id: int, month_start: datetime) -> tuple[Decimal, Decimal]:
+    """Return (income, expense) for the month starting at month_start — a
+    single primary-key read, no SUM and no write."""
+    row = db.session.get(UserFinance, (user_id, month_start.strftime("%Y-%m")))
+    if row is None:
+        return _ZERO, _ZERO
+    return row.income, row.expense
+
+
+def apply_delta(session, user_id: int, month: str, t_type: str, amount: Decimal) -> None:
+    """Add `amount` (negative to subtract) to one month's income or expense
+    total, creating the month's row if it has none yet. For writes that
+    bypass the ORM flush (and so the hook below)."""
+    if t_type not in ("income", "expense"):
+        return
+    if t_type == "income":
+        _upsert_totals(session, user_id, month, amount, _ZERO)
+    else:
+        _upsert_totals(session, user_id, month, _ZERO, amount)
+
+
+def _upsert_totals(session, user_id: int, month: str, income: Decimal, expense: Decimal) -> None:
+    """Runs on `session`'s own connection, so the adjustment commits or
+    rolls back together with the write it accounts for."""
+    if not income and not expense:
+        return
+    insert = postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(UserFinance).values(
+        user_id=user_id, month=month, income=income, expense=expense,
+        updated_at=datetime.now(timezone.utc),
+    )
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserFinance.user_id, UserFinance.month],
+            set_={
+                "income": UserFinance.income + stmt.excluded.income,
+                "expense": UserFinance.expense + stmt.excluded.expense,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+    )
+
+
+def _as_decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
+
+
+def _current(tx: Transaction) -> tuple:
+    return tx.user_id, tx.type, _as_decimal(tx.amount), month_key(tx.timestamp)
+
+
+def _previous(tx: Transaction) -> tuple:
+    """What a dirty or deleted Transaction looked like as last loaded from
+    the DB. The tracked columns are active_history (see
+    artha/models/finance.py), so an overwritten value's prior state is
+    always in history.deleted — loaded on the spot if it wasn't already."""
+    state = inspect(tx)
+    values = {}
+    for key in _TRACKED:
+        history = state.attrs[key].history
+        if history.deleted:
+            values[key] = history.deleted[0]
+        elif history.unchanged:
+            values[key] = history.unchanged[0]
+        elif history.added:
+            # Nothing was there before (a NULL column).
+            values[key] = None
+        else:
+            values[key] = getattr(tx, key)
+    return values["user_id"], values["type"], _as_decimal(values["amount"]), month_key(values["timestamp"])
+
+
+def _add_delta(deltas: dict, user_id, t_type, amount, month, sign) -> None:
+    if t_type not in ("income", "expense"):
+        return
+    income_expense = deltas.setdefault((user_id, month), [_ZERO, _ZERO])
+    income_expense[0 if t_type == "income" else 1] += sign * amount
+
+
+def _write_deltas(session, deltas: dict) -> None:
+    for (uid, month), (income, expense) in deltas.items():
+        _upsert_totals(session, uid, month, income, expense)
+
+
+def account_inserted(session, transactions) -> None:
+    """Count Transactions that were inserted without an ORM flush (a bulk
+    INSERT ... RETURNING), exactly as the hook below counts session.new —
+    one upsert per (user, month), however many rows."""
+    deltas: dict[tuple, list[Decimal]] = {}
+    for tx in transactions:
+        uid, t_type, amount, month = _current(tx)
+        _add_delta(deltas, uid, t_type, amount, month, 1)
+    _write_deltas(session, deltas)
+
+
+@event.listens_for(db.session, "before_flush")
+def _track_transaction_writes(session, flush_context, instances):
+    deltas: dict[tuple, list[Decimal]] = {}
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            uid, t_type, amount, month = _current(obj)
+            _add_delta(deltas, uid, t_type, amount, month, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            uid, t_type, amount, month = _previous(obj)
+            _add_delta(deltas, uid, t_type, amount, month, -1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Transaction) or not session.is_modified(obj):
+            continue
+        prev = _previous(obj)
+        curr = _current(obj)
+        if prev == curr:
+            continue
+        uid, t_type, amount, month = prev
+        _add_delta(deltas, uid, t_type, amount, month, -1)
+        uid, t_type, amount, month = curr
+        _add_delta(deltas, uid, t_type, amount, month, 1)
+
+    _write_deltas(session, deltas)
@@ -1,16 +1,146 @@
 import re
+import time
 from datetime import date, datetime
 from decimal import Decimal
 from html.parser import HTMLParser
 
-from flask import request
+from flask import request, session
+from sqlalchemy import func, insert, select, update
+
+from .extensions import db
 
 
 def is_ajax_request() -> bool:
-    """True when the request expects a JSON response rather than a full page."""
+    """True when the request expects a JSON response rather than a full page.
+
+    Memoized per request — error branches can ask several times. Stored in
+    the WSGI environ rather than on flask.g: g belongs to the app context,
+    which can outlive a single request (the test suite keeps one pushed
+    across many), while the environ never does."""
+    cached = request.environ.get("artha.is_ajax")
+    if cached is not None:
+        return cached
     xrw = request.headers.get("X-Requested-With") == "XMLHttpRequest"
-    accept_json = "application/json" in (request.headers.get("Accept") or "")
-    return xrw or accept_json or request.path.startswith("/api/")
+    # Real content negotiation rather than a substring test on Accept, so
+    # "text/html, application/json;q=0.1" still gets the page while
+    # "application/json, text/html" still gets JSON. JSON has to be named
+    # outright, though — a bare */* (fetch()'s default) or a browser's
+    # trailing */*;q=0.8 doesn't count as asking for it.
+    accept = request.accept_mimetypes
+    accept_json = (
+        any(mimetype == "application/json" for mimetype, _ in accept)
+        and accept.best_match(["application/json", "text/html"]) == "application/json"
+    )
+    result = xrw or accept_json or request.is_json or request.path.startswith("/api/")
+    request.environ["artha.is_ajax"] = result
+    return result
+
+
+def vary_on_negotiation(response):
+    """after_request hook. Any response whose shape was picked by
+    is_ajax_request() depends on these request headers, so caches and
+    proxies must key on them too."""
+    if "artha.is_ajax" in request.environ:
+        response.vary.update(("Accept", "X-Requested-With"))
+    return response
+
+
+# How long a delete can be undone, and the session keys holding the
+# snapshot each undo endpoint restores from.
+UNDO_WINDOW_SECONDS = 10
+UNDO_SESSION_KEYS = ("last_deleted_note", "last_deleted_tx")
+_UNDO_ENDPOINTS = {"notes.undo_delete_note", "finance.undo_delete_transaction"}
+
+
+def undo_expired(snapshot: dict) -> bool:
+    return time.time() - float(snapshot.get("deleted_at", 0)) > UNDO_WINDOW_SECONDS
+
+
+def drop_expired_undo_snapshots() -> None:
+    """before_request hook. The session is a signed cookie, so an undo
+    snapshot (a whole note's content, say) rides along on every request
+    until something pops it — previously only the next delete or undo
+    attempt did, however long after the window closed. Popping it as soon
+    as it's stale lets the very next response shrink the cookie back.
+
+    Membership is tested with `in`, which — unlike session.get() — doesn't
+    mark the session accessed, so requests carrying no snapshot (and every
+    static asset) don't pick up a Vary: Cookie and stay shared-cacheable.
+    The undo endpoints themselves are left alone: they run their own
+    expiry check, so a late click is told the window expired rather than
+    that there's nothing to undo."""
+    if request.endpoint == "static" or request.endpoint in _UNDO_ENDPOINTS:
+        return
+    if not any(key in session for key in UNDO_SESSION_KEYS):
+        return
+    for key in UNDO_SESSION_KEYS:
+        snapshot = session.get(key)
+        if snapshot is not None and undo_expired(snapshot):
+            session.pop(key, None)
+
+
+def next_position(model, user_id: int):
+    """SQL expression for "one past this user's highest position", meant to
+    be assigned straight to a new row's position attribute. It's evaluated
+    inside the INSERT itself — no separate SELECT max() round-trip first,
+    and no window between reading the max and writing the row for another
+    request to claim the same number. (Positions aren't unique either way;
+    every listing breaks ties by id.)"""
+    return (
+        select(func.coalesce(func.max(model.position), 0) + 1)
+        .where(model.user_id == user_id)
+        .scalar_subquery()
+    )
+
+
+def supports_dml_cte() -> bool:
+    """Postgres can run an UPDATE inside a WITH clause of another
+    statement; SQLite can't."""
+    return db.session.get_bind().dialect.name == "postgresql"
+
+
+def _onupdate_values(model) -> dict:
+    """Each onupdate column's value for a fresh UPDATE, spelled out. Inside
+    a CTE SQLAlchemy won't apply a Python-side onupdate default on its own,
+    so the statement has to carry it explicitly."""
+    values = {}
+    for column in model.__table__.c:
+        default = column.onupdate
+        if default is None:
+            continue
+        values[column] = default.arg(None) if default.is_callable else default.arg
+    return values
+
+
+def shift_positions(model, user_id: int, position: int):
+    """UPDATE bumping every one of this user's rows at or after `position`
+    down one slot, to make room for a restored row. onupdate columns
+    (Note.updated_at) are bumped like on any other UPDATE. Shared by
+    insert_shifting_positions and the undo routes' two-statement fallback
+    so both dialects treat them the same."""
+    return (
+        update(model)
+        .where(model.user_id == user_id, model.position >= position)
+        .values({model.position: model.position + 1, **_onupdate_values(model)})
+    )
+
+
+def insert_shifting_positions(model, user_id: int, position: int, values: dict):
+    """
+    Postgres only (see supports_dml_cte). Restores a row at `position` by
+    running shift_positions() and inserting the new row in a single
+    WITH shifted AS (UPDATE ...) INSERT statement, instead of a separate
+    UPDATE round-trip first. Returns the inserted row as a regular ORM
+    instance (via RETURNING).
+    """
+    shifted = shift_positions(model, user_id, position).returning(model.id).cte("shifted")
+    stmt = (
+        insert(model)
+        .values(user_id=user_id, position=position, **values)
+        .add_cte(shifted)
+        .returning(model)
+    )
+    return db.session.scalars(stmt).one()
 
 
 # ---------------------------------------------------------------------------
@@ -117,7 +247,9 @@ def current_month_bounds() -> tuple[datetime, datetime]:
     for `Transaction.timestamp >= start, Transaction.timestamp < end`
     filtering. Shared by the dashboard and /api/finance_totals so both
     default to "this month" the same way the /finance page's month tabs
-    already do (see _month_start in finance/routes.py)."""
+    already do (see _month_start in finance/routes.py), on the same
+    date.today() calendar — as does month_key() in finance_totals_service,
+    so the totals row and this range always name the same month."""
     today = date.today()
     start = datetime(today.year, today.month, 1)
     if today.month == 12:
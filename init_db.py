@@ -1,7 +1,7 @@
 import os
 import sys
 import logging
-import shutil
+import sqlite3
 import datetime
 import traceback
 import argparse
@@ -21,19 +21,41 @@ logging.basicConfig(
 BACKUP_RETENTION_DAYS = int(os.getenv("DB_BACKUP_RETENTION_DAYS", "30"))
 SKIP_CONFIRM_ENV = os.getenv("INIT_DB_SKIP_CONFIRM", "").lower() in ("1", "true", "yes")
 
+def copy_sqlite_db(src, dst):
+    """Copy one SQLite database onto another through SQLite's online
+    backup API rather than a plain file copy. site.db runs in WAL mode
+    (see _sqlite_pragmas in artha/extensions.py), so recently committed
+    pages can still be sitting in site.db-wal — copying site.db alone
+    would silently drop them, and overwriting it underneath a leftover
+    -wal/-shm pair can corrupt the result. The backup API reads through
+    the WAL and writes the destination as a consistent whole."""
+    with sqlite3.connect(src) as source, sqlite3.connect(dst) as target:
+        source.backup(target)
+    # sqlite3's context manager only ends the transaction; close explicitly
+    # so the destination's own -wal is checkpointed and removed.
+    source.close()
+    target.close()
+
 def cleanup_old_backups(backup_dir, retention_days):
-    now = datetime.datetime.now()
-    cutoff = now - datetime.timedelta(days=retention_days)
-    for f in os.listdir(backup_dir):
-        if f.startswith("site.db") and f.endswith(".bak"):
-            full_path = os.path.join(backup_dir, f)
-            mtime = datetime.datetime.fromtimestamp(os.path.getmtime(full_path))
-            if mtime < cutoff:
-                try:
-                    os.remove(full_path)
-                    logging.info(f"🗑️ Removed old backup: {f}")
-                except Exception as e:
-                    logging.warning(f"Failed to remove old backup {f}: {e}")
+    """Delete backups older than the retention window and return the
+    DirEntry for every one that's left, so main() can list them and pick
+    the latest without scanning the directory (or stat-ing each file)
+    a second time."""
+    cutoff = (datetime.datetime.now() - datetime.timedelta(days=retention_days)).timestamp()
+    with os.scandir(backup_dir) as it:
+        entries = [e for e in it if e.name.startswith("site.db") and e.name.endswith(".bak")]
+
+    survivors = []
+    for entry in entries:
+        if entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                logging.info(f"🗑️ Removed old backup: {entry.name}")
+                continue
+            except Exception as e:
+                logging.warning(f"Failed to remove old backup {entry.name}: {e}")
+        survivors.append(entry)
+    return survivors
 
 def main():
     # Production safeguard
@@ -62,13 +84,11 @@ def main():
         db_path = os.path.join(app.instance_path, "site.db")
 
         # Cleanup old backups
-        cleanup_old_backups(app.instance_path, BACKUP_RETENTION_DAYS)
-
-        backups = [f for f in os.listdir(app.instance_path) if f.startswith("site.db") and f.endswith(".bak")]
+        backups = cleanup_old_backups(app.instance_path, BACKUP_RETENTION_DAYS)
         if backups and not force_reset:
             logging.info("Available backups:")
             for b in backups:
-                logging.info(f" - {b}")
+                logging.info(f" - {b.name}")
             logging.info("Press Enter to skip restore and continue initialization.")
         else:
             logging.info("No backups found or force reset requested.")
@@ -81,25 +101,22 @@ def main():
         if restore_choice:
             backup_path = os.path.join(app.instance_path, restore_choice)
             if os.path.exists(backup_path):
-                shutil.copy2(backup_path, db_path)
+                copy_sqlite_db(backup_path, db_path)
                 logging.info(f"🔄 Restored database from {backup_path}")
                 sys.exit(0)
             else:
                 logging.error(f"Backup file {backup_path} not found.")
                 sys.exit(1)
         elif backups and not force_reset:
-            latest_backup = max(
-                [os.path.join(app.instance_path, b) for b in backups],
-                key=os.path.getmtime
-            )
-            shutil.copy2(latest_backup, db_path)
+            latest_backup = max(backups, key=lambda e: e.stat().st_mtime).path
+            copy_sqlite_db(latest_backup, db_path)
             logging.info(f"🔄 Automatically restored most recent backup: {latest_backup}")
             sys.exit(0)
 
         if os.path.exists(db_path) and not force_reset:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = f"{db_path}.{timestamp}.bak"
-            shutil.copy2(db_path, backup_path)
+            copy_sqlite_db(db_path, backup_path)
             logging.info(f"📦 Existing database backed up to {backup_path}")
 
         try:
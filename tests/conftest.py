@@ -1,4 +1,7 @@
+from contextlib import contextmanager
+
 import pytest
+from sqlalchemy import event
 
 from artha import create_app
 from artha.extensions import db as _db
@@ -60,3 +63,32 @@ def auth_client(client, user):
     """A test client already logged in as `user` (password: password123)."""
     client.post("/login", data={"username": user.username, "password": "password123"})
     return client
+
+
+@pytest.fixture()
+def count_queries(app):
+    """Context manager counting the SQL statements executed inside it:
+
+        with count_queries() as queries:
+            client.get("/")
+        assert len(queries) == ...
+
+    Used to pin a view's query count so a lazy-loaded relationship
+    touched per row (an N+1) shows up as a failing test rather than in
+    production latency."""
+
+    @contextmanager
+    def _count():
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = _db.engine
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+
+    return _count
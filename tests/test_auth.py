@@ -1,4 +1,5 @@
 import pytest
+from werkzeug.security import generate_password_hash
 
 from artha import create_app
 from artha.config import TestingConfig
@@ -93,6 +94,24 @@ def test_login_sets_last_login_at(client, user):
     assert refreshed.last_login_at is not None
 
 
+def test_login_upgrades_legacy_pbkdf2_hash(client, user):
+    user.password_hash = generate_password_hash("password123", method="pbkdf2:sha256")
+    _db.session.commit()
+
+    client.post("/login", data={"username": user.username, "password": "password123"})
+
+    refreshed = User.query.filter_by(username=user.username).first()
+    assert refreshed.password_hash.startswith("scrypt:32768:8:1$")
+    assert refreshed.check_password("password123")
+
+
+def test_existing_default_scrypt_hash_is_not_rehashed(user):
+    # Werkzeug's bare "scrypt" uses the same N/r/p we pin, so hashes made
+    # before the parameters were spelled out must not be churned.
+    user.password_hash = generate_password_hash("password123", method="scrypt")
+    assert not user.password_needs_rehash
+
+
 def test_logout_requires_login(client):
     resp = client.get("/logout", follow_redirects=False)
     assert resp.status_code == 302
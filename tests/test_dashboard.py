@@ -0,0 +1,59 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from artha.extensions import db
+from artha.models import Note, Transaction
+
+
+def _populate(user, n):
+    for i in range(n):
+        db.session.add(Note(content=f"note {i}", user_id=user.id, position=i + 1, due_date=date.today()))
+        db.session.add(Transaction(
+            description=f"tx {i}",
+            amount=Decimal("5"),
+            type="expense",
+            user_id=user.id,
+            position=i + 1,
+            is_recurring=True,
+            timestamp=datetime.now(timezone.utc),
+        ))
+    db.session.commit()
+
+
+def _dashboard_query_count(auth_client, count_queries):
+    # Expire first so every request starts from the same cold identity
+    # map, like a fresh request would in production.
+    db.session.expire_all()
+    with count_queries() as queries:
+        resp = auth_client.get("/")
+    assert resp.status_code == 200
+    return len(queries)
+
+
+def test_dashboard_query_count_does_not_grow_with_rows(auth_client, user, count_queries):
+    _populate(user, 1)
+    baseline = _dashboard_query_count(auth_client, count_queries)
+
+    _populate(user, 10)
+    assert _dashboard_query_count(auth_client, count_queries) == baseline
+
+
+def test_dashboard_caps_transaction_list_but_counts_whole_month(auth_client, user, monkeypatch):
+    from artha.blueprints.dashboard import routes
+
+    monkeypatch.setattr(routes, "DASHBOARD_TX_LIMIT", 3)
+    _populate(user, 5)
+
+    body = auth_client.get("/?view=finance").get_data(as_text=True)
+    assert body.count('<li class="tx-row') == 3
+    assert "latest 3 of 5" in body
+
+
+def test_dashboard_html_is_compressed_when_accepted(auth_client):
+    resp = auth_client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+
+    resp = auth_client.get("/", headers={"Accept-Encoding": "gzip, br, zstd"})
+    assert resp.headers["Content-Encoding"] == "zstd"
@@ -0,0 +1,258 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from artha import create_app
+from artha.config import TestingConfig
+from artha.extensions import db
+from artha.models import Note, Transaction, UserFinance
+from artha.services import finance_totals_service
+from artha.services.finance_totals_service import get_month_totals, sum_income_expense
+from artha.utils import current_month_bounds
+
+from .conftest import make_user
+
+AJAX_HEADERS = {"X-Requested-With": "XMLHttpRequest"}
+
+
+def _totals(client):
+    return client.get("/api/finance_totals").get_json()
+
+
+def _month_row(user):
+    return db.session.get(UserFinance, (user.id, date.today().strftime("%Y-%m")))
+
+
+def _month_sum(user):
+    month_start, month_end = current_month_bounds()
+    return sum_income_expense(user.id, month_start, month_end)
+
+
+def test_first_write_creates_month_row(auth_client, user):
+    assert _totals(auth_client)["income"] == 0.0
+    assert _month_row(user) is None
+
+    db.session.add(Transaction(
+        description="Paycheck", amount=Decimal("1000"), type="income",
+        user_id=user.id, timestamp=datetime.now(timezone.utc),
+    ))
+    db.session.commit()
+
+    row = _month_row(user)
+    assert row.income == Decimal("1000")
+    assert row.expense == Decimal("0")
+    assert _totals(auth_client)["income"] == 1000.0
+
+
+def test_route_writes_keep_running_totals_in_step(auth_client, user):
+    auth_client.post(
+        "/add_transaction",
+        data={"description": "Groceries", "amount": "50.25", "type": "expense"},
+        headers=AJAX_HEADERS,
+    )
+    assert _totals(auth_client) == {"income": 0.0, "expense": 50.25, "balance": -50.25}
+
+    tx = Transaction.query.filter_by(user_id=user.id).one()
+    auth_client.post(f"/update_transaction/{tx.id}", json={"amount": "80", "type": "income"})
+    assert _totals(auth_client) == {"income": 80.0, "expense": 0.0, "balance": 80.0}
+
+    auth_client.post(f"/delete_transaction/{tx.id}", headers=AJAX_HEADERS)
+    assert _totals(auth_client) == {"income": 0.0, "expense": 0.0, "balance": 0.0}
+
+    auth_client.post("/undo_delete_transaction")
+    assert _totals(auth_client) == {"income": 80.0, "expense": 0.0, "balance": 80.0}
+
+
+def test_moving_transaction_out_of_month_subtracts_it(auth_client, user):
+    tx = Transaction(
+        description="Bonus", amount=Decimal("300"), type="income",
+        user_id=user.id, timestamp=datetime.now(timezone.utc),
+    )
+    db.session.add(tx)
+    db.session.commit()
+    assert _totals(auth_client)["income"] == 300.0
+
+    last_month = datetime.now(timezone.utc).replace(day=1) - timedelta(days=1)
+    auth_client.post(f"/update_transaction/{tx.id}", json={"date": last_month.strftime("%Y-%m-%d")})
+    assert _totals(auth_client)["income"] == 0.0
+
+
+def test_rolled_back_write_leaves_totals_untouched(auth_client, user):
+    db.session.add(Transaction(
+        description="Never saved", amount=Decimal("999"), type="expense",
+        user_id=user.id, timestamp=datetime.now(timezone.utc),
+    ))
+    db.session.flush()
+    db.session.rollback()
+
+    assert _totals(auth_client)["expense"] == 0.0
+
+
+def test_unchanged_totals_return_304(auth_client, user):
+    first = auth_client.get("/api/finance_totals")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = auth_client.get("/api/finance_totals", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+    auth_client.post(
+        "/add_transaction",
+        data={"description": "Coffee", "amount": "4.50", "type": "expense"},
+        headers=AJAX_HEADERS,
+    )
+    changed = auth_client.get("/api/finance_totals", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.get_json()["expense"] == 4.5
+
+
+def test_sum_income_expense_splits_by_type_in_range(user):
+    now = datetime.now(timezone.utc)
+    db.session.add_all([
+        Transaction(description="Pay", amount=Decimal("100.50"), type="income", user_id=user.id, timestamp=now),
+        Transaction(description="Rent", amount=Decimal("40"), type="expense", user_id=user.id, timestamp=now),
+        Transaction(
+            description="Old", amount=Decimal("7"), type="expense", user_id=user.id,
+            timestamp=now - timedelta(days=400),
+        ),
+    ])
+    db.session.commit()
+
+    assert sum_income_expense(user.id, now - timedelta(days=1)) == (Decimal("100.50"), Decimal("40"))
+    assert sum_income_expense(user.id, now + timedelta(days=1)) == (Decimal("0"), Decimal("0"))
+
+
+def test_bulk_add_keeps_totals_and_appends_positions(auth_client, user):
+    from artha.blueprints.finance.routes import _bulk_add_transactions
+
+    db.session.add(Transaction(description="Existing", amount=Decimal("1"), type="expense",
+                               user_id=user.id, position=4))
+    db.session.commit()
+
+    inserted = _bulk_add_transactions(user.id, [
+        {"description": "Salary", "amount": "2000", "type": "income"},
+        {"description": "Rent", "amount": Decimal("900.50"), "type": "expense"},
+        {"description": "Cable", "amount": "40", "type": "expense", "is_recurring": True},
+    ])
+    assert [(t.description, t.position) for t in inserted] == [("Salary", 5), ("Rent", 6), ("Cable", 7)]
+    assert all(t.id for t in inserted)
+    db.session.commit()  # the helper leaves that to its caller
+
+    totals = _totals(auth_client)
+    assert totals["income"] == 2000.0
+    assert totals["expense"] == 941.5
+    row = _month_row(user)
+    assert (row.income, row.expense) == _month_sum(user)
+    positions = db.session.scalars(
+        db.select(Transaction.position).filter_by(user_id=user.id).order_by(Transaction.position)
+    ).all()
+    assert positions == [4, 5, 6, 7]
+
+
+def test_bulk_add_rolls_back_with_its_caller(user):
+    from artha.blueprints.finance.routes import _bulk_add_transactions
+
+    _bulk_add_transactions(user.id, [{"description": "Salary", "amount": "2000", "type": "income"}])
+    db.session.rollback()
+
+    assert _month_row(user) is None
+    assert db.session.scalar(db.select(db.func.count()).select_from(Transaction)) == 0
+
+
+def test_updating_an_expired_transaction_applies_an_exact_delta(user):
+    last_month = datetime.now(timezone.utc).replace(day=1) - timedelta(days=1)
+    db.session.add_all([
+        Transaction(description="Old", amount=Decimal("20"), type="expense", user_id=user.id, timestamp=last_month),
+        Transaction(description="New", amount=Decimal("50"), type="expense", user_id=user.id,
+                    timestamp=datetime.now(timezone.utc)),
+    ])
+    db.session.commit()  # expires both rows
+    tx = db.session.scalar(db.select(Transaction).filter_by(description="New"))
+    db.session.expire(tx)
+
+    # Overwritten without the old values ever being loaded.
+    tx.amount = Decimal("80")
+    tx.type = "income"
+    db.session.commit()
+
+    assert (_month_row(user).income, _month_row(user).expense) == _month_sum(user) == (Decimal("80"), Decimal("0"))
+    # Other months are untouched rather than wiped.
+    old = db.session.get(UserFinance, (user.id, last_month.strftime("%Y-%m")))
+    assert old.expense == Decimal("20")
+
+
+def test_reading_totals_never_sums_or_commits(user, monkeypatch):
+    db.session.add(Transaction(
+        description="Pay", amount=Decimal("10"), type="income", user_id=user.id, timestamp=datetime.now(timezone.utc),
+    ))
+    db.session.commit()
+
+    def no_sum(*args, **kwargs):
+        raise AssertionError("reads must not re-sum")
+
+    monkeypatch.setattr(finance_totals_service, "sum_income_expense", no_sum)
+    db.session.add(Note(content="pending", user_id=user.id, position=1))
+
+    month_start, _ = current_month_bounds()
+    assert get_month_totals(user.id, month_start) == (Decimal("10"), Decimal("0"))
+
+    db.session.rollback()
+    assert db.session.scalar(db.select(Note).filter_by(content="pending")) is None
+
+
+@pytest.fixture()
+def file_app(app, tmp_path, monkeypatch):
+    """Same as `app`, but on a file-backed SQLite DB with a real pool, so a
+    second session gets a genuinely separate connection."""
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'totals.db'}")
+    file_app = create_app("testing")
+    ctx = file_app.app_context()
+    ctx.push()
+    db.create_all()
+    yield file_app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+def test_write_committed_on_another_connection_mid_read_is_counted(file_app, monkeypatch):
+    user = make_user(username="race")
+    month_start, _ = current_month_bounds()
+    other = db.session.session_factory()
+    writes = []
+
+    def concurrent_write():
+        other.add(Transaction(
+            description=f"Mid-read {len(writes)}", amount=Decimal("50"), type="expense",
+            user_id=user.id, timestamp=datetime.now(timezone.utc),
+        ))
+        other.commit()
+        writes.append(1)
+
+    # Land a write from another connection in the middle of a read — both
+    # right after its row lookup and, should a read ever re-sum again,
+    # between that SUM and whatever it stores.
+    real_get, real_sum = db.session.get, finance_totals_service.sum_income_expense
+
+    def get_then_write(*args, **kwargs):
+        row = real_get(*args, **kwargs)
+        concurrent_write()
+        return row
+
+    def sum_then_write(*args, **kwargs):
+        result = real_sum(*args, **kwargs)
+        concurrent_write()
+        return result
+
+    with monkeypatch.context() as m:
+        m.setattr(db.session, "get", get_then_write)
+        m.setattr(finance_totals_service, "sum_income_expense", sum_then_write)
+        get_month_totals(user.id, month_start)
+    other.close()
+    assert writes
+
+    db.session.expire_all()
+    expected = (Decimal("0"), Decimal("50") * len(writes))
+    assert get_month_totals(user.id, month_start) == _month_sum(user) == expected
@@ -0,0 +1,150 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from artha import create_app
+from artha.config import TestingConfig
+from artha.extensions import db
+from artha.models import Note
+
+from .conftest import make_user
+
+
+def _add_note(user, content, position):
+    note = Note(content=content, user_id=user.id, position=position)
+    db.session.add(note)
+    db.session.commit()
+    return note
+
+
+def test_reorder_notes_gives_top_card_highest_position(auth_client, user):
+    a = _add_note(user, "a", 1)
+    b = _add_note(user, "b", 2)
+    c = _add_note(user, "c", 3)
+    a_id, b_id, c_id = a.id, b.id, c.id
+
+    resp = auth_client.post("/reorder_notes", json={"order": [a_id, c_id, b_id]})
+    assert resp.status_code == 200
+
+    db.session.expire_all()
+    assert db.session.get(Note, a_id).position == 3
+    assert db.session.get(Note, c_id).position == 2
+    assert db.session.get(Note, b_id).position == 1
+
+
+def test_reorder_notes_rejects_other_users_ids_without_changes(auth_client, user):
+    mine = _add_note(user, "mine", 1)
+    other = make_user(username="mallory", password="password123")
+    theirs = _add_note(other, "theirs", 7)
+    mine_id, theirs_id = mine.id, theirs.id
+
+    resp = auth_client.post("/reorder_notes", json={"order": [theirs_id, mine_id]})
+    assert resp.status_code == 403
+
+    db.session.expire_all()
+    assert db.session.get(Note, mine_id).position == 1
+    assert db.session.get(Note, theirs_id).position == 7
+
+
+def test_expired_undo_snapshot_is_dropped_from_session(auth_client, user):
+    note = _add_note(user, "soon gone", 1)
+    auth_client.post(f"/delete_note/{note.id}", headers={"X-Requested-With": "XMLHttpRequest"})
+
+    with auth_client.session_transaction() as sess:
+        snapshot = sess["last_deleted_note"]
+        sess["last_deleted_note"] = {**snapshot, "deleted_at": snapshot["deleted_at"] - 60}
+
+    auth_client.get("/notes")
+
+    with auth_client.session_transaction() as sess:
+        assert "last_deleted_note" not in sess
+
+
+def test_undo_within_window_restores_note(auth_client, user):
+    note = _add_note(user, "come back", 1)
+    auth_client.post(f"/delete_note/{note.id}", headers={"X-Requested-With": "XMLHttpRequest"})
+
+    resp = auth_client.post("/undo_delete_note")
+    assert resp.status_code == 200
+    assert Note.query.filter_by(user_id=user.id, content="come back").count() == 1
+
+
+def test_other_users_note_is_not_found(auth_client, user):
+    other = make_user(username="mallory", password="password123")
+    theirs = _add_note(other, "private", 1)
+
+    assert auth_client.get(f"/notes/{theirs.id}").status_code == 404
+    assert auth_client.patch(f"/notes/{theirs.id}/update", json={"content": "hacked"}).status_code == 404
+    db.session.expire_all()
+    assert db.session.get(Note, theirs.id).content == "private"
+
+
+def test_late_undo_reports_expired_window(auth_client, user):
+    note = _add_note(user, "too late", 1)
+    auth_client.post(f"/delete_note/{note.id}", headers={"X-Requested-With": "XMLHttpRequest"})
+
+    with auth_client.session_transaction() as sess:
+        snapshot = sess["last_deleted_note"]
+        sess["last_deleted_note"] = {**snapshot, "deleted_at": snapshot["deleted_at"] - 60}
+
+    resp = auth_client.post("/undo_delete_note")
+    assert resp.status_code == 400
+    assert resp.get_json()["message"] == "Undo window expired."
+
+
+def test_static_assets_do_not_vary_on_cookie(auth_client):
+    resp = auth_client.get("/static/js/notes.js")
+    assert resp.status_code == 200
+    assert "Cookie" not in resp.headers.get("Vary", "")
+
+
+@pytest.fixture()
+def pg_app(app, monkeypatch):
+    """Same as `app`, but on a real Postgres so the single-statement CTE
+    restore in insert_shifting_positions actually runs. Opt-in: point
+    ARTHA_TEST_POSTGRES_URL at a throwaway database."""
+    url = os.environ.get("ARTHA_TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("ARTHA_TEST_POSTGRES_URL not set")
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_DATABASE_URI", url)
+    pg = create_app("testing")
+    ctx = pg.app_context()
+    ctx.push()
+    db.create_all()
+    yield pg
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+def _assert_undo_restores_in_place_and_bumps_neighbours(client, user):
+    stamp = datetime(2024, 1, 1, 9, 30)
+    notes = [_add_note(user, f"n{i}", i) for i in (1, 2, 3)]
+    for note in notes:
+        note.updated_at = stamp
+    db.session.commit()
+    middle_id, last_id = notes[1].id, notes[2].id
+
+    client.post(f"/delete_note/{middle_id}", headers={"X-Requested-With": "XMLHttpRequest"})
+    resp = client.post("/undo_delete_note")
+    assert resp.status_code == 200
+
+    db.session.expire_all()
+    restored = db.session.get(Note, resp.get_json()["id"])
+    last = db.session.get(Note, last_id)
+    assert (restored.content, restored.position) == ("n2", 2)
+    assert last.position == 4
+    # Shifted like any other UPDATE, so updated_at moves on both dialects.
+    assert last.updated_at.replace(tzinfo=None) > stamp
+
+
+def test_undo_shift_bumps_updated_at(auth_client, user):
+    _assert_undo_restores_in_place_and_bumps_neighbours(auth_client, user)
+
+
+def test_undo_shift_bumps_updated_at_on_postgres(pg_app):
+    user = make_user(username="pg_alice")
+    client = pg_app.test_client()
+    client.post("/login", data={"username": "pg_alice", "password": "password123"})
+    _assert_undo_restores_in_place_and_bumps_neighbours(client, user)
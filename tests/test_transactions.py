@@ -53,6 +53,22 @@ def test_add_transaction_rejects_invalid_type(auth_client):
     assert Transaction.query.count() == 0
 
 
+def test_accept_header_negotiates_json_or_page(auth_client):
+    def post(accept):
+        return auth_client.post(
+            "/add_transaction",
+            data={"description": "", "amount": "10", "type": "expense"},
+            headers={"Accept": accept},
+        )
+
+    for accept in ("application/json", "application/json, text/html"):
+        resp = post(accept)
+        assert resp.status_code == 400, accept
+        assert "Accept" in resp.headers["Vary"]
+    for accept in ("*/*", "text/html, application/json;q=0.1", "text/html,application/xhtml+xml,*/*;q=0.8"):
+        assert post(accept).status_code == 302, accept
+
+
 def test_add_transaction_requires_login(client):
     resp = client.post(
         "/add_transaction",
@@ -89,7 +105,7 @@ def test_update_transaction_blocks_other_users(auth_client, user):
         f"/update_transaction/{tx.id}",
         json={"description": "Hacked", "amount": "999", "type": "income"},
     )
-    assert resp.status_code == 403
+    assert resp.status_code == 404
     refreshed = db.session.get(Transaction, tx.id)
     assert refreshed.description == "Private"
 
@@ -105,6 +121,20 @@ def test_delete_transaction(auth_client, user):
     assert db.session.get(Transaction, tx_id) is None
 
 
+def test_undo_delete_transaction_keeps_original_timestamp(auth_client, user):
+    stamp = datetime(2024, 3, 15, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    tx = Transaction(description="Back again", amount=Decimal("7"), type="expense", user_id=user.id, timestamp=stamp)
+    db.session.add(tx)
+    db.session.commit()
+
+    auth_client.post(f"/delete_transaction/{tx.id}", headers=AJAX_HEADERS)
+    resp = auth_client.post("/undo_delete_transaction", headers=AJAX_HEADERS)
+    assert resp.status_code == 200
+
+    restored = db.session.scalar(db.select(Transaction).filter_by(description="Back again"))
+    assert restored.timestamp.replace(tzinfo=timezone.utc) == stamp
+
+
 def test_delete_transaction_blocks_other_users(auth_client, user):
     other = make_user(username="mallory2", password="password123")
     tx = Transaction(description="Private", amount=Decimal("10"), type="expense", user_id=other.id)
@@ -112,7 +142,7 @@ def test_delete_transaction_blocks_other_users(auth_client, user):
     db.session.commit()
 
     resp = auth_client.post(f"/delete_transaction/{tx.id}", headers=AJAX_HEADERS)
-    assert resp.status_code == 403
+    assert resp.status_code == 404
     assert db.session.get(Transaction, tx.id) is not None
 
 
@@ -201,3 +231,21 @@ def test_deleting_recurring_transaction_stops_it_regenerating(auth_client, user)
 
     regenerated = auth_client.post("/finance/generate-recurring").get_json()
     assert regenerated["generated"] == 0
+
+
+def test_finance_totals_sums_current_month_by_type(auth_client, user):
+    now = datetime.now(timezone.utc)
+    db.session.add_all([
+        Transaction(description="Paycheck", amount=Decimal("2000"), type="income", user_id=user.id, timestamp=now),
+        Transaction(description="Rent", amount=Decimal("1200"), type="expense", user_id=user.id, timestamp=now),
+        Transaction(description="Coffee", amount=Decimal("4.50"), type="expense", user_id=user.id, timestamp=now),
+    ])
+    db.session.commit()
+
+    data = auth_client.get("/api/finance_totals").get_json()
+    assert data == {"income": 2000.0, "expense": 1204.5, "balance": 795.5}
+
+
+def test_finance_totals_zero_when_no_transactions(auth_client):
+    data = auth_client.get("/api/finance_totals").get_json()
+    assert data == {"income": 0.0, "expense": 0.0, "balance": 0.0}